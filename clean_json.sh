@@ -1,6 +1,6 @@
-rm json/articles/*.json
-rm json/references/*.json
-rm json/dois/*.json
-rm json/urls/*.json
-rm json/xhtmls/*.json
-rm json/pdfs/*.json
\ No newline at end of file
+find json/articles/ -type f -name "*.json*" -delete
+find json/references/ -type f -name "*.json*" -delete
+find json/dois/ -type f -name "*.json*" -delete
+find json/urls/ -type f -name "*.json*" -not -path "json/urls/archives/*" -delete
+find json/xhtmls/ -type f -name "*.json*" -delete
+find json/pdfs/ -type f -name "*.json*" -delete
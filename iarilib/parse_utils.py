@@ -1,20 +1,195 @@
 # parse_utils.py
+import html as html_lib
 import re
+from typing import List, Optional, Union
 
 from bs4 import BeautifulSoup
+from lxml import etree
+from mwparserfromhell.nodes import Tag  # type: ignore
+from mwparserfromhell.wikicode import Wikicode  # type: ignore
 
 # logging.basicConfig(level=config.loglevel)
 import logging
 logger = logging.getLogger(__name__)
 
+# the sections we extract general references from, by the id of their h2 heading
+reference_section_ids = ("Bibliography", "Further_reading")
+references_wrap_class = "mw-references-wrap"
+stream_chunk_size = 64 * 1024
 
-def extract_cite_refs(html):
+
+# fallback for refs that mwparserfromhell leaves as text, e.g. <ref name="Wilson"\>
+ref_name_regex = re.compile(
+    r"""<ref\b[^>]*?\bname\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE
+)
+
+
+def __is_ref__(tag) -> bool:
+    return str(tag.tag).strip().lower() == "ref"
+
+
+def extract_ref_name(wikicode: Union[Tag, Wikicode]) -> str:
+    """Return the name attribute of the first <ref> in the wikicode or "" if there is none
+
+    This reads the attributes straight from the mwparserfromhell tree"""
+    name = None
+    if isinstance(wikicode, Tag) and __is_ref__(wikicode):
+        ref = wikicode
+    else:
+        ref = next(wikicode.ifilter_tags(matches=__is_ref__), None)
+    if ref is not None:
+        for attribute in ref.attributes:
+            # like in html the first attribute wins
+            if str(attribute.name).strip().lower() == "name":
+                name = html_lib.unescape(str(attribute.value))
+                break
+    else:
+        match = ref_name_regex.search(str(wikicode))
+        if match:
+            name = html_lib.unescape(next(group for group in match.groups() if group is not None))
+    if not name:
+        return ""
+    if name.endswith("\\"):
+        # Cut off the trailing backward slash
+        name = name[:-1]
+    if name.endswith("/"):
+        # Cut off the trailing forward slash
+        name = name[:-1]
+    return name
+
+
+def extract_comments(wikicode: Union[Tag, Wikicode]) -> List[str]:
+    """Return the text of all html comments in the wikicode, also those inside templates"""
+    if isinstance(wikicode, Tag):
+        wikicode = wikicode.contents
+    return [str(comment.contents) for comment in wikicode.ifilter_comments(recursive=True)]
+
+
+def remove_html_comments(text: str) -> str:
+    """Remove html comments <!-- --> from wikitext in linear time
+
+    Like in MediaWiki a comment can span lines and
+    a comment that is never closed runs to the end of the text"""
+    if "<!--" not in text:
+        return text
+    parts = []
+    position = 0
+    while True:
+        start = text.find("<!--", position)
+        if start == -1:
+            parts.append(text[position:])
+            break
+        parts.append(text[position:start])
+        end = text.find("-->", start + 4)
+        if end == -1:
+            break
+        position = end + 3
+    return "".join(parts)
+
+
+def __has_class__(element, css_class):
+    return css_class in (element.get("class") or "").split()
+
+
+def parse_reference_subtrees(html):
+    """Parse only the parts of the html that hold references
+
+    This streams the html through lxml and keeps only
+    * the first div.mw-references-wrap
+    * every <section> that contains a h2 with an id in reference_section_ids
+
+    Everything else is cleared as soon as its top level section has ended, so
+    we never build a BeautifulSoup tree of the prose.
+
+    The kept subtrees are returned in document order as one BeautifulSoup,
+    so find() and find_all() give the same results as on the full document."""
+    if not html:
+        return BeautifulSoup("", "lxml")
+
+    parser = etree.HTMLPullParser(events=("start", "end"))
+    open_sections = []  # [element, matched]
+    references_wrap = None
+    fragments = []  # (document position, html)
+    position = 0
+
+    def handle_events():
+        nonlocal references_wrap, position
+        for event, element in parser.read_events():
+            if event == "start":
+                position += 1
+                if element.tag == "section":
+                    open_sections.append([element, False, position])
+                elif (
+                    element.tag == "h2"
+                    and element.get("id") in reference_section_ids
+                ):
+                    # like section.find("h2", id=...) every enclosing section matches
+                    for open_section in open_sections:
+                        open_section[1] = True
+                elif (
+                    references_wrap is None
+                    and element.tag == "div"
+                    and __has_class__(element, references_wrap_class)
+                ):
+                    references_wrap = [element, position]
+                continue
+
+            if references_wrap is not None and element is references_wrap[0]:
+                # no need to keep it separately if a matched section contains it
+                if not any(matched for _, matched, _ in open_sections):
+                    fragments.append(
+                        (
+                            references_wrap[1],
+                            etree.tostring(element, encoding="unicode", method="html", with_tail=False),
+                        )
+                    )
+            elif element.tag == "section" and open_sections:
+                _, matched, start = open_sections.pop()
+                # nested matched sections are part of the enclosing fragment
+                if matched and not any(matched for _, matched, _ in open_sections):
+                    fragments.append(
+                        (start, etree.tostring(element, encoding="unicode", method="html", with_tail=False))
+                    )
+
+            # free everything we are done with at the top level
+            parent = element.getparent()
+            if not open_sections and parent is not None and parent.tag == "body":
+                element.clear()
+                parent.remove(element)
+
+    for start in range(0, len(html), stream_chunk_size):
+        parser.feed(html[start : start + stream_chunk_size])
+        handle_events()
+    parser.close()
+    handle_events()
+
+    fragments.sort(key=lambda fragment: fragment[0])
+    return BeautifulSoup("".join(html for _, html in fragments), "lxml")
+
+
+def tag_html(tag, pretty_html: bool = False, omit_html: bool = False) -> Optional[str]:
+    """Return the html of a BeautifulSoup tag as we output it
+
+    It is compact by default. prettify() re-serializes with indentation,
+    which is slow and makes the json we store and return a lot larger.
+    None is returned if omit_html is set or there is no tag."""
+    if tag is None or omit_html:
+        return None
+    if pretty_html:
+        return tag.prettify()
+    return str(tag)
+
+
+def extract_cite_refs(html, soup=None, pretty_html: bool = False, omit_html: bool = False):
+    """Extract the cite refs from the references section of the html
+
+    Pass soup if the html has already been parsed, to avoid parsing it again.
+    See tag_html() for pretty_html and omit_html"""
 
     # NB TODO we could do a citod here, and see what we get backfrom the raw html...
 
-    soup = BeautifulSoup(html, "html.parser")
-    # for link in soup.find_all("a"):
-    #     print(link.get("href"))
+    if soup is None:
+        soup = BeautifulSoup(html, "lxml")
 
     ref_wrapper = soup.find("div", class_="mw-references-wrap")
 
@@ -59,7 +234,8 @@ def extract_cite_refs(html):
                 cite = span_link.find("cite")
 
                 if cite:
-                    cite_html = cite.prettify()  # marked up html
+                    # marked up html
+                    cite_html = tag_html(cite, pretty_html=pretty_html, omit_html=omit_html)
 
                     # extract urls from <a> tags from <cite>
                     a_tags = cite.find_all('a')
@@ -70,7 +246,7 @@ def extract_cite_refs(html):
 
 #
             if not cite_html:
-                span_html = span_link.prettify()
+                span_html = tag_html(span_link, pretty_html=pretty_html, omit_html=omit_html)
 
             refs.append(
                 {
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""Move the cached json files into the sharded layout, see src/helpers/cache_layout.py"""
+import argparse
+
+import config
+from src.helpers import cache_layout
+
+parser = argparse.ArgumentParser(
+    description="Move the cached json files into the sharded layout"
+)
+parser.add_argument(
+    "directory",
+    nargs="?",
+    default=config.subdirectory_for_json,
+    help="defaults to config.subdirectory_for_json",
+)
+parser.add_argument(
+    "--dry-run", action="store_true", help="only count what would be moved"
+)
+args = parser.parse_args()
+moved, removed = cache_layout.migrate(args.directory, dry_run=args.dry_run)
+if args.dry_run:
+    print(f"would move {moved} files and remove {removed} stale files")
+else:
+    print(f"moved {moved} files and removed {removed} stale files")
@@ -0,0 +1,80 @@
+"""Encoding of the json files we cache on disk
+
+Cached json is stored compact and compressed, the names are the Content-Encoding
+the compressed bytes can be sent to a patron with:
+
+    IARI_CACHE_COMPRESSION  gzip (default), zstd (needs the zstandard package,
+                            else we use gzip) or none for plain json
+
+The compression is appended to the file name, e.g. <id>.json.gz, so plain
+files written by older versions are still found and read.
+
+Usage:
+    from src.helpers import cache_encoding
+    encoding = cache_encoding.write_encoding()
+    raw = cache_encoding.encode(data, encoding=encoding)
+    data = cache_encoding.decode(raw, encoding=encoding)
+"""
+import gzip
+import json
+import logging
+import os
+from typing import Any, List
+
+try:
+    import zstandard  # type: ignore
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_COMPRESSION = os.getenv("IARI_CACHE_COMPRESSION", "gzip").lower()
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+# file name suffix per encoding, "" is plain json
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst", "": ""}
+
+
+def write_encoding() -> str:
+    """The encoding we store new files with"""
+    if CACHE_COMPRESSION == "zstd" and zstandard is not None:
+        return "zstd"
+    if CACHE_COMPRESSION == "none":
+        return ""
+    return "gzip"
+
+
+def read_encodings() -> List[str]:
+    """The encodings we look for when reading, the one we write first"""
+    encodings = [write_encoding()]
+    for encoding in SUFFIXES:
+        if encoding not in encodings and (encoding != "zstd" or zstandard is not None):
+            encodings.append(encoding)
+    return encodings
+
+
+def compress(raw: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        # mtime=0 so the same json always gives the same bytes
+        return gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return raw
+
+
+def decompress(raw: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(raw)
+    if encoding == "zstd":
+        return zstandard.ZstdDecompressor().decompress(raw)
+    return raw
+
+
+def encode(data: Any, encoding: str) -> bytes:
+    """Compact json, compressed with the encoding"""
+    raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return compress(raw, encoding=encoding)
+
+
+def decode(raw: bytes, encoding: str) -> Any:
+    return json.loads(decompress(raw, encoding=encoding))
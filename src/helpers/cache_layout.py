@@ -0,0 +1,84 @@
+"""Layout of the json files we cache on disk
+
+A folder like json/urls/ has hundreds of thousands of files, so they are
+spread over two levels of subfolders named after the md5 of the file name:
+
+    json/articlesV2/3f/a2/en.wikipedia.org.1234.5678.json.gz
+
+Files of older versions are directly in the folder. We keep reading them
+there until they are moved into the new layout:
+
+    python migrate_json_layout.py [--dry-run] [directory]
+
+    IARI_CACHE_FLAT_FALLBACK  1 (default) also look for files in the old flat layout,
+                              set it to 0 when they are moved
+
+Usage:
+    from src.helpers import cache_layout
+    path_filename = f"{folder}{cache_layout.shard(filename)}{filename}"
+"""
+import hashlib
+import logging
+import os
+import re
+from typing import Tuple
+
+from src.helpers import cache_encoding
+
+logger = logging.getLogger(__name__)
+
+CACHE_FLAT_FALLBACK = bool(int(os.getenv("IARI_CACHE_FLAT_FALLBACK", "1")))
+# 256 * 256 subfolders keep a few hundred million files at a few thousand per folder
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+
+shard_folder = re.compile(f"^[0-9a-f]{{{SHARD_WIDTH}}}$")
+cache_file = re.compile(r"^(?P<filename>[^.].*\.json)(\.gz|\.zst)?$")
+
+
+def shard(filename: str) -> str:
+    """The subfolders of the file, e.g. "3f/a2/" """
+    digest = hashlib.md5(filename.encode("utf-8")).hexdigest()
+    return "".join(
+        f"{digest[level * SHARD_WIDTH:(level + 1) * SHARD_WIDTH]}/"
+        for level in range(SHARD_LEVELS)
+    )
+
+
+def migrate(directory: str, dry_run: bool = False) -> Tuple[int, int]:
+    """Move the files of the flat layout in directory and its folders into the sharded layout
+
+    Returns the number of files moved and of the stale files removed,
+    that is files that were already written again in the sharded layout."""
+    moved = removed = 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                # e.g. urls/archives/ is a folder of its own inside urls/
+                if not shard_folder.match(entry.name):
+                    sub_moved, sub_removed = migrate(entry.path, dry_run=dry_run)
+                    moved += sub_moved
+                    removed += sub_removed
+                continue
+            match = cache_file.match(entry.name)
+            if not match or not entry.is_file(follow_symlinks=False):
+                continue
+            filename = match.group("filename")
+            folder = os.path.join(directory, shard(filename))
+            target = os.path.join(folder, entry.name)
+            if any(
+                os.path.exists(os.path.join(folder, filename + suffix))
+                for suffix in cache_encoding.SUFFIXES.values()
+            ):
+                # the file was written again in the sharded layout after this one
+                logger.debug(f"removing stale {entry.path}")
+                if not dry_run:
+                    os.remove(entry.path)
+                removed += 1
+            else:
+                logger.debug(f"moving {entry.path} to {target}")
+                if not dry_run:
+                    os.makedirs(folder, exist_ok=True)
+                    os.replace(entry.path, target)
+                moved += 1
+    return moved, removed
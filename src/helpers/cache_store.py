@@ -0,0 +1,263 @@
+"""Where FileIo keeps the json it caches
+
+    IARI_CACHE_STORE        file (default) one file per entry in json/, see cache_layout
+                            or sqlite, all entries in one sqlite database
+    IARI_CACHE_SQLITE_PATH  the database of the sqlite store, default json/cache.sqlite3
+
+The stores keep the bytes encoded by cache_encoding, so what is stored
+can be sent to the patron as it is. Switching the store starts with an
+empty cache.
+
+The sqlite store saves an inode per entry, which matters for the many
+small entries like url checks, dois and archive status, and reads many
+entries in one query. That is done by /statistics/references with
+FileIo.read_many_from_disk(), /check-url, /check-doi and /check-url-archive
+only read the one entry of their request. It runs in WAL mode so the gunicorn
+workers read while one of them writes. Next to the payload it keeps lang,
+page_id, revision, created_at, size and version in indexed columns so we can
+find and evict entries without decoding them.
+
+Usage:
+    from src.helpers import cache_store
+    content, encoding = cache_store.get_store().read(io)
+"""
+import logging
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+import tempfile
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import config
+from src.helpers import cache_encoding, cache_layout
+from src.helpers.get_version import get_poetry_version
+from src.helpers.per_process import PerProcess
+
+if TYPE_CHECKING:
+    from src.models.file_io import FileIo
+
+logger = logging.getLogger(__name__)
+
+CACHE_STORE = os.getenv("IARI_CACHE_STORE", "file").lower()
+CACHE_SQLITE_PATH = os.getenv("IARI_CACHE_SQLITE_PATH", "")
+# permissions of the files we write, like open() with the usual umask 022
+FILE_MODE = 0o644
+# sqlite allows this many parameters in one query in all versions we support
+MAX_VARIABLES = 999
+
+_stores: Dict[str, "CacheStore"] = {}
+_lock = threading.RLock()
+
+
+class CacheStore(ABC):
+    """Keeps the encoded json of FileIo entries, see get_store()"""
+
+    @abstractmethod
+    def read(self, io: "FileIo") -> Tuple[Optional[bytes], str]:
+        """Return the stored bytes and their encoding, None if nothing is stored"""
+
+    def read_many(self, ios: Sequence["FileIo"]) -> List[Tuple[Optional[bytes], str]]:
+        """Like read() for each of the entries, in the same order"""
+        return [self.read(io) for io in ios]
+
+    @abstractmethod
+    def write(self, io: "FileIo", content: bytes, encoding: str) -> None:
+        """Store the bytes in the encoding in place of what is stored for io"""
+
+
+class FileStore(CacheStore):
+    """One file per entry, in the sharded layout with a fallback to the flat layout"""
+
+    def read(self, io: "FileIo") -> Tuple[Optional[bytes], str]:
+        for path_filename in self.__stored_path_filenames__(io):
+            for encoding in cache_encoding.read_encodings():
+                try:
+                    with open(
+                        file=path_filename + cache_encoding.SUFFIXES[encoding], mode="rb"
+                    ) as file:
+                        return file.read() or None, encoding
+                except FileNotFoundError:
+                    continue
+        logger.debug("no json on disk")
+        return None, ""
+
+    def write(self, io: "FileIo", content: bytes, encoding: str) -> None:
+        path_filename = io.path_filename + cache_encoding.SUFFIXES[encoding]
+        logger.debug(f"FileStore::write: path_filename: {path_filename}")
+        os.makedirs(os.path.dirname(path_filename), exist_ok=True)
+        self.__write_atomically__(path_filename=path_filename, content=content)
+        # the file of an older version or another compression would be stale now
+        for stored_path_filename in self.__stored_path_filenames__(io):
+            for suffix in cache_encoding.SUFFIXES.values():
+                stale_path_filename = stored_path_filename + suffix
+                if stale_path_filename == path_filename:
+                    continue
+                try:
+                    os.remove(stale_path_filename)
+                    logger.debug(f"removed stale {stale_path_filename}")
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def __stored_path_filenames__(io: "FileIo") -> List[str]:
+        """Where we look for the file, the flat layout last"""
+        if cache_layout.CACHE_FLAT_FALLBACK:
+            return [io.path_filename, io.flat_path_filename]
+        return [io.path_filename]
+
+    @staticmethod
+    def __write_atomically__(path_filename: str, content: bytes) -> None:
+        """Write to a temporary file next to the file and rename it into place
+
+        Readers open either the old or the new file, never a half written one,
+        and concurrent writers do not fail, the last rename wins."""
+        directory, filename = os.path.split(path_filename)
+        fd, temporary_path_filename = tempfile.mkstemp(
+            dir=directory or ".", prefix=f".{filename}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, mode="wb") as file:
+                file.write(content)
+                file.flush()
+                os.fsync(file.fileno())
+            # mkstemp creates the file readable only by us
+            os.chmod(temporary_path_filename, FILE_MODE)
+            os.replace(temporary_path_filename, path_filename)
+        except BaseException:
+            try:
+                os.remove(temporary_path_filename)
+            except FileNotFoundError:
+                pass
+            raise
+
+
+class SqliteStore(CacheStore):
+    """All entries in one sqlite database, keyed by subfolder and file name"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = PerProcess(create=self.__connect__, lock=_lock)
+        self._version: Optional[str] = None
+
+    @staticmethod
+    def key(io: "FileIo") -> str:
+        """e.g. articlesV2/en.wikipedia.org.1234.5678.json"""
+        return f"{io.subfolder}{io.filename}"
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Return the connection of this process, see PerProcess"""
+        return self._connection.get()
+
+    def __connect__(self) -> sqlite3.Connection:
+        logger.debug(f"opening cache store {self.path} for pid {os.getpid()}")
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        # many gunicorn workers read and write the same file
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, "
+            "encoding TEXT NOT NULL, "
+            "payload BLOB NOT NULL, "
+            "lang TEXT, "
+            "page_id INTEGER, "
+            "revision INTEGER, "
+            "created_at INTEGER NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "version TEXT)"
+        )
+        for name, columns in (
+            ("page", "lang, page_id, revision"),
+            ("created_at", "created_at"),
+            ("size", "size"),
+            ("version", "version"),
+        ):
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS cache_{name}_index ON cache({columns})"
+            )
+        connection.commit()
+        return connection
+
+    @property
+    def version(self) -> Optional[str]:
+        """The version of IARI that wrote the entries"""
+        if self._version is None:
+            try:
+                self._version = get_poetry_version("pyproject.toml") or ""
+            except OSError:
+                self._version = ""
+        return self._version or None
+
+    def read(self, io: "FileIo") -> Tuple[Optional[bytes], str]:
+        with _lock:
+            row = (
+                self.get_connection()
+                .execute(
+                    "SELECT payload, encoding FROM cache WHERE key = ?", (self.key(io),)
+                )
+                .fetchone()
+            )
+        if row is None:
+            logger.debug("no json in the cache store")
+            return None, ""
+        return row[0], row[1]
+
+    def read_many(self, ios: Sequence["FileIo"]) -> List[Tuple[Optional[bytes], str]]:
+        keys = [self.key(io) for io in ios]
+        rows: Dict[str, Tuple[bytes, str]] = {}
+        with _lock:
+            connection = self.get_connection()
+            for start in range(0, len(keys), MAX_VARIABLES):
+                batch = keys[start : start + MAX_VARIABLES]
+                for key, payload, encoding in connection.execute(
+                    "SELECT key, payload, encoding FROM cache "
+                    f"WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ):
+                    rows[key] = payload, encoding
+        return [rows.get(key, (None, "")) for key in keys]
+
+    def write(self, io: "FileIo", content: bytes, encoding: str) -> None:
+        job = io.job
+        with _lock:
+            connection = self.get_connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO cache "
+                "(key, encoding, payload, lang, page_id, revision, created_at, size, version) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.key(io),
+                    encoding,
+                    content,
+                    getattr(job, "lang", None) or None,
+                    getattr(job, "page_id", None) or None,
+                    getattr(job, "revision", None) or None,
+                    int(time.time()),
+                    len(content),
+                    self.version,
+                ),
+            )
+            connection.commit()
+
+
+def get_store() -> CacheStore:
+    """The store configured with IARI_CACHE_STORE"""
+    store = _stores.get(CACHE_STORE)
+    if store is None:
+        with _lock:
+            store = _stores.get(CACHE_STORE)
+            if store is None:
+                if CACHE_STORE == "sqlite":
+                    store = SqliteStore(
+                        path=CACHE_SQLITE_PATH
+                        or f"{config.subdirectory_for_json}cache.sqlite3"
+                    )
+                else:
+                    store = FileStore()
+                _stores[CACHE_STORE] = store
+    return store
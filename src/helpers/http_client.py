@@ -0,0 +1,84 @@
+"""Shared pooled HTTP client for all upstream calls
+
+Every gunicorn worker gets one requests.Session with keep-alive connection pools
+so that repeated calls to the same host (e.g. en.wikipedia.org) reuse
+the TLS connection instead of doing a new handshake every time.
+
+Usage:
+    from src.helpers import http_client
+    response = http_client.get(url)
+"""
+import logging
+import os
+import threading
+from typing import Any
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+from src.helpers.per_process import PerProcess
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) in seconds, used for the MediaWiki and ORES APIs when the caller does not give a timeout
+DEFAULT_TIMEOUT = (5, 30)
+# hosts and their subdomains the default timeout applies to, other services
+# like IABot's testdeadlink can take minutes and keep waiting as long as they need
+DEFAULT_TIMEOUT_HOSTS = ("wikipedia.org", "wikimedia.org")
+# number of hosts we keep a pool for
+POOL_CONNECTIONS = 20
+# max number of keep-alive connections per host
+POOL_MAXSIZE = 10
+
+_lock = threading.RLock()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to DEFAULT_TIMEOUT_HOSTS if the caller did not pass one"""
+
+    def __init__(self, *args, timeout: Any = DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def default_timeout(self, url: str) -> Any:
+        host = urlparse(url).hostname or ""
+        for timeout_host in DEFAULT_TIMEOUT_HOSTS:
+            if host == timeout_host or host.endswith(f".{timeout_host}"):
+                return self.timeout
+        return None
+
+    def send(self, request, **kwargs):  # type: ignore
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.default_timeout(request.url)
+        return super().send(request, **kwargs)
+
+
+def __build_session__() -> requests.Session:
+    logger.debug(f"creating pooled http session for pid {os.getpid()}")
+    session = requests.Session()
+    session.headers.update({"User-Agent": config.user_agent})
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_session = PerProcess(create=__build_session__, lock=_lock)
+
+
+def get_session() -> requests.Session:
+    """Return the session of this worker process, see PerProcess"""
+    return _session.get()
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return get_session().get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return get_session().post(url, **kwargs)
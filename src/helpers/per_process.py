@@ -0,0 +1,51 @@
+"""Objects every process must create for itself
+
+A sqlite connection, a process pool or the sockets of an http session
+must not be shared with a gunicorn worker forked after they were created.
+We keep the pid the object was created in and create it again when we
+find ourselves in another process.
+
+Usage:
+    from src.helpers.per_process import PerProcess
+    connection = PerProcess(create=lambda: sqlite3.connect(path))
+    connection.get().execute("SELECT 1")
+"""
+import os
+import threading
+from typing import Any, Callable, ContextManager, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class PerProcess(Generic[T]):
+    """Holds the object create() returned in this process"""
+
+    def __init__(
+        self, create: Callable[[], T], lock: Optional[ContextManager[Any]] = None
+    ):
+        self.create = create
+        self.lock = threading.RLock() if lock is None else lock
+        self.value: Optional[T] = None
+        self.pid = 0
+
+    @property
+    def created(self) -> bool:
+        """Whether the object was created in this process"""
+        return self.value is not None and self.pid == os.getpid()
+
+    def get(self) -> T:
+        """The object of this process, created on the first call"""
+        if not self.created:
+            with self.lock:
+                if not self.created:
+                    self.value = self.create()
+                    self.pid = os.getpid()
+        return self.value  # type: ignore
+
+    def reset(self) -> None:
+        """Forget the object, the next call to get() creates a new one
+
+        Close it first if it was created in this process"""
+        with self.lock:
+            self.value = None
+            self.pid = 0
@@ -0,0 +1,105 @@
+"""Shared process pool for CPU bound extraction
+
+Reference extraction is pure python and holds the GIL, so on very large
+articles we can spread it over a few processes. This is opt-in:
+
+    IARI_EXTRACTION_WORKERS            number of worker processes, 0 (default) disables the pool
+    IARI_PARALLEL_EXTRACTION_MIN_SIZE  only articles with at least this many characters
+                                       of wikitext are extracted in parallel
+
+Every gunicorn worker gets its own pool which lives as long as the worker,
+so we pay for starting the processes only once.
+
+Usage:
+    from src.helpers import process_pool
+    if process_pool.enabled(size=len(wikitext)):
+        results = process_pool.map_in_batches(function, items)
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+from typing import Any, Callable, List, Sequence
+
+from src.helpers.per_process import PerProcess
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_WORKERS = int(os.getenv("IARI_EXTRACTION_WORKERS", "0"))
+PARALLEL_EXTRACTION_MIN_SIZE = int(
+    os.getenv("IARI_PARALLEL_EXTRACTION_MIN_SIZE", "300000")
+)
+# more batches than workers evens out batches that take longer than others
+BATCHES_PER_WORKER = 4
+# modules the forkserver imports before it starts the workers
+FORKSERVER_PRELOAD = ["src"]
+
+_lock = threading.RLock()
+
+
+def enabled(size: int) -> bool:
+    """Whether work of this size should go to the pool"""
+    return EXTRACTION_WORKERS > 0 and size >= PARALLEL_EXTRACTION_MIN_SIZE
+
+
+def __get_context__() -> BaseContext:
+    """Start the workers from a forkserver, or spawn them where there is none
+
+    The pool is created during an extraction while the threads fetching the html
+    and the ORES score run, forking then could copy locks they hold into the workers.
+    The forkserver is started before it forks anything and imports src once,
+    so the workers do not import it again."""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(FORKSERVER_PRELOAD)
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def __create_pool__() -> ProcessPoolExecutor:
+    logger.debug(
+        f"creating process pool with {EXTRACTION_WORKERS} workers for pid {os.getpid()}"
+    )
+    return ProcessPoolExecutor(
+        max_workers=max(EXTRACTION_WORKERS, 1), mp_context=__get_context__()
+    )
+
+
+_pool = PerProcess(create=__create_pool__, lock=_lock)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Return the pool of this worker process, see PerProcess"""
+    return _pool.get()
+
+
+def shutdown() -> None:
+    """Shut the pool down, the next call to get_pool() starts a new one"""
+    with _lock:
+        if _pool.created:
+            _pool.get().shutdown(wait=False)
+        _pool.reset()
+
+
+def map_in_batches(
+    function: Callable[[List[Any]], List[Any]], items: Sequence[Any]
+) -> List[Any]:
+    """Split items into batches, run function on every batch in the pool
+    and return all results in the order of items
+
+    function gets a list of items and must return one result per item.
+    Exceptions raised in a worker are raised here."""
+    if not items:
+        return []
+    number_of_batches = max(EXTRACTION_WORKERS, 1) * BATCHES_PER_WORKER
+    batch_size = -(-len(items) // number_of_batches)
+    batches = [
+        list(items[start : start + batch_size])
+        for start in range(0, len(items), batch_size)
+    ]
+    results: List[Any] = []
+    for batch_results in get_pool().map(function, batches):
+        results.extend(batch_results)
+    return results
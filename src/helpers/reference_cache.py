@@ -0,0 +1,197 @@
+"""Persistent cache of extracted references
+
+The same reference shows up in many revisions of an article and in articles
+that share citations. We store what we extracted from a reference under the md5
+of its wikitext so the next time we see it we skip the extraction.
+
+    IARI_REFERENCE_CACHE_PATH         sqlite database file, empty (default) disables the cache
+    IARI_REFERENCE_CACHE_MAX_ENTRIES  above this the least recently used entries are evicted
+
+The table is the hash table from sql/wcdimportbot.sql with the payload next to the hash.
+Every process has its own connection. Writes are kept in memory and committed
+in one transaction by flush(), call it when done with an article.
+
+Usage:
+    from src.helpers import reference_cache
+    payload = reference_cache.get(key)
+    reference_cache.put(key, payload)
+    reference_cache.flush()
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from src.helpers.per_process import PerProcess
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_CACHE_PATH = os.getenv("IARI_REFERENCE_CACHE_PATH", "")
+REFERENCE_CACHE_MAX_ENTRIES = int(
+    os.getenv("IARI_REFERENCE_CACHE_MAX_ENTRIES", "1000000")
+)
+# we commit on our own when this many writes are waiting
+MAX_PENDING_WRITES = 1000
+# when evicting we make room for this share of the entries
+EVICTION_SHARE = 0.1
+
+_number_of_entries: int = 0
+_pending_writes: Dict[Tuple[str, str], bytes] = {}
+_pending_reads: Dict[Tuple[str, str], int] = {}
+_hits: int = 0
+_misses: int = 0
+_lock = threading.RLock()
+
+
+def enabled() -> bool:
+    return bool(REFERENCE_CACHE_PATH)
+
+
+def __connect__() -> sqlite3.Connection:
+    global _number_of_entries
+    logger.debug(
+        f"opening reference cache {REFERENCE_CACHE_PATH} for pid {os.getpid()}"
+    )
+    # what is pending was read or written by the process we were forked from
+    _pending_writes.clear()
+    _pending_reads.clear()
+    connection = sqlite3.connect(
+        REFERENCE_CACHE_PATH, timeout=30, check_same_thread=False
+    )
+    # many gunicorn workers read and write the same file
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS hash ("
+        "hash TEXT NOT NULL, "
+        "variant TEXT NOT NULL, "
+        "payload BLOB NOT NULL, "
+        "last_used INTEGER NOT NULL, "
+        "PRIMARY KEY (hash, variant))"
+    )
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS hash_last_used_index ON hash(last_used)"
+    )
+    connection.commit()
+    _number_of_entries = __count__(connection)
+    return connection
+
+
+_connection = PerProcess(create=__connect__, lock=_lock)
+
+
+def get_connection() -> sqlite3.Connection:
+    """Return the connection of this process, see PerProcess"""
+    return _connection.get()
+
+
+def __count__(connection: sqlite3.Connection) -> int:
+    return connection.execute("SELECT COUNT(*) FROM hash").fetchone()[0]
+
+
+def get(key: Tuple[str, str]) -> Optional[bytes]:
+    """Return the payload stored under key which is the hash and the variant"""
+    global _hits, _misses
+    if not enabled():
+        return None
+    with _lock:
+        payload = _pending_writes.get(key)
+        if payload is None:
+            row = (
+                get_connection()
+                .execute(
+                    "SELECT payload FROM hash WHERE hash = ? AND variant = ?", key
+                )
+                .fetchone()
+            )
+            if row is not None:
+                payload = row[0]
+                _pending_reads[key] = int(time.time())
+        if payload is None:
+            _misses += 1
+        else:
+            _hits += 1
+        return payload
+
+
+def put(key: Tuple[str, str], payload: bytes) -> None:
+    if not enabled():
+        return
+    with _lock:
+        get_connection()
+        _pending_writes[key] = payload
+        if len(_pending_writes) >= MAX_PENDING_WRITES:
+            flush()
+
+
+def flush() -> None:
+    """Commit the waiting writes and the last used times of the entries we read"""
+    global _number_of_entries
+    if not enabled():
+        return
+    with _lock:
+        if not _pending_writes and not _pending_reads:
+            return
+        connection = get_connection()
+        now = int(time.time())
+        with connection:
+            connection.executemany(
+                "UPDATE hash SET last_used = ? WHERE hash = ? AND variant = ?",
+                [(last_used, *key) for key, last_used in _pending_reads.items()],
+            )
+            cursor = connection.executemany(
+                "INSERT OR REPLACE INTO hash (hash, variant, payload, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                [(*key, payload, now) for key, payload in _pending_writes.items()],
+            )
+            _number_of_entries += max(cursor.rowcount, 0)
+        logger.debug(
+            f"flushed {len(_pending_writes)} references to the cache "
+            f"and updated {len(_pending_reads)}"
+        )
+        _pending_writes.clear()
+        _pending_reads.clear()
+        if _number_of_entries > REFERENCE_CACHE_MAX_ENTRIES:
+            __evict__()
+
+
+def __evict__() -> None:
+    """Delete the least recently used entries to get below the maximum"""
+    global _number_of_entries
+    connection = get_connection()
+    # other processes write to the same file so we count again
+    _number_of_entries = __count__(connection)
+    excess = _number_of_entries - REFERENCE_CACHE_MAX_ENTRIES
+    if excess <= 0:
+        return
+    number_to_delete = excess + int(REFERENCE_CACHE_MAX_ENTRIES * EVICTION_SHARE)
+    with connection:
+        connection.execute(
+            "DELETE FROM hash WHERE rowid IN "
+            "(SELECT rowid FROM hash ORDER BY last_used LIMIT ?)",
+            (number_to_delete,),
+        )
+    _number_of_entries = __count__(connection)
+    logger.info(f"evicted {number_to_delete} references from the cache")
+
+
+def close() -> None:
+    """Flush and close the connection, the next call opens it again"""
+    with _lock:
+        if _connection.created:
+            flush()
+            _connection.get().close()
+        _connection.reset()
+
+
+def info() -> Dict[str, int]:
+    """Hits and misses of this process and the entries in the cache"""
+    return {
+        "hits": _hits,
+        "misses": _misses,
+        "entries": _number_of_entries,
+        "pending_writes": len(_pending_writes),
+    }
+
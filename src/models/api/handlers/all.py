@@ -7,8 +7,8 @@ from typing import Any, Dict, List, Optional, Set
 from urllib.parse import quote
 
 import aiohttp
-import requests
 
+from src.helpers import http_client
 from src.models.api.job.article_job import ArticleJob
 from src.models.base import WariBaseModel
 from src.models.exceptions import MissingInformationError
@@ -149,7 +149,7 @@ class AllHandler(WariBaseModel):
         app.logger.debug("__fetch_article__: running")
         url = f"http://18.217.22.248/v2/statistics/article?url={self.__quote__(self.job.url)}&regex={self.__quote__(self.job.regex)}&refresh={self.job.refresh}"
         app.logger.debug(f"using url: {url}")
-        response = requests.get(url)
+        response = http_client.get(url)
         if response.status_code == 200:
             self.data = response.json()
             app.logger.info(
@@ -5,7 +5,6 @@ from io import BytesIO
 from typing import Any, Dict, List, Optional, Tuple
 
 import fitz  # type: ignore
-import requests
 import validators  # type: ignore
 from fitz import (
     Document,  # type: ignore
@@ -16,6 +15,7 @@ from fitz import (
 from requests import ReadTimeout
 
 from config import regex_url_link_extraction
+from src.helpers import http_client
 from src.models.api.handlers import BaseHandler
 from src.models.api.job.check_url_job import UrlJob
 from src.models.api.link.pdf_link import PdfLink
@@ -157,7 +157,7 @@ class PdfHandler(BaseHandler):
         app.logger.debug("__download_pdf__: running")
         if not self.content:
             try:
-                response = requests.get(self.job.url, timeout=self.job.timeout)
+                response = http_client.get(self.job.url, timeout=self.job.timeout)
                 if response.content:
                     self.content = response.content
                 else:
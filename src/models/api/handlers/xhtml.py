@@ -1,10 +1,10 @@
 import logging
 from typing import Any, Dict, List, Optional
 
-import requests
 import validators  # type: ignore
 from bs4 import BeautifulSoup
 
+from src.helpers import http_client
 from src.models.api.handlers import BaseHandler
 from src.models.api.job.check_url_job import UrlJob
 from src.models.api.link.xhtml_link import XhtmlLink
@@ -39,7 +39,7 @@ class XhtmlHandler(BaseHandler):
             "text/html",
         ]
         if not self.content:
-            response = requests.get(self.job.url, timeout=self.job.timeout)
+            response = http_client.get(self.job.url, timeout=self.job.timeout)
             content_type = response.headers["content-type"]
             if response.status_code != 200:
                 self.error = True
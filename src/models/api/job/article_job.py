@@ -1,9 +1,7 @@
 import re
 from urllib.parse import quote, unquote
 
-import requests
-
-import config
+from src.helpers import http_client
 from src.models.api.job import Job
 from src.models.exceptions import MissingInformationError, WikipediaApiFetchError
 from src.models.wikimedia.enums import WikimediaDomain
@@ -54,8 +52,7 @@ class ArticleJob(Job):
                 f"https://{self.lang}.{self.domain.value}/"
                 f"w/rest.php/v1/page/{self.quoted_title}"
             )
-            headers = {"User-Agent": config.user_agent}
-            response = requests.get(url, headers=headers)
+            response = http_client.get(url)
             # console.print(response.json())
             if response.status_code == 200:
                 data = response.json()
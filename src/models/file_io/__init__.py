@@ -1,9 +1,8 @@
-import json
 import logging
-from os.path import exists
-from typing import Any, Dict, Optional
+from typing import Any, Collection, Dict, Optional, Sequence, Tuple
 
 import config
+from src.helpers import cache_encoding, cache_layout, cache_store
 from src.models.api.job import Job
 from src.models.base import WariBaseModel
 
@@ -23,58 +22,90 @@ class FileIo(WariBaseModel):
         return f"{self.wari_id}.json"
 
     @property
-    def path_filename(self) -> str:
+    def folder(self) -> str:
         if self.testing:
             # TODO simplify this!
             testing_dir = "/home/dpriskorn/src/python/wcdimportbot/"  # we hard code the test json directory for now
             # TODO: if testing, try to go out to repo root first
-            path_filename = f"{testing_dir}{config.subdirectory_for_json}{self.subfolder}{self.filename}"
-        else:
-            path_filename = (
-                f"{config.subdirectory_for_json}{self.subfolder}{self.filename}"
-            )
+            return f"{testing_dir}{config.subdirectory_for_json}{self.subfolder}"
+        return f"{config.subdirectory_for_json}{self.subfolder}"
 
-        return path_filename
+    @property
+    def path_filename(self) -> str:
+        """The file in the sharded layout, see cache_layout"""
+        filename = self.filename
+        return f"{self.folder}{cache_layout.shard(filename)}{filename}"
+
+    @property
+    def flat_path_filename(self) -> str:
+        """The file in the flat layout of older versions"""
+        return f"{self.folder}{self.filename}"
+
+    @property
+    def store(self) -> cache_store.CacheStore:
+        return cache_store.get_store()
 
     def write_to_disk(
         self,
     ) -> None:
-
+        """Write self.data as compact json compressed as configured to the store,
+        see cache_encoding and cache_store"""
         from src import app
 
         if self.data:
-            path_filename = self.path_filename
+            encoding = cache_encoding.write_encoding()
 
-            app.logger.debug(f"FileIo::write_to_disk: path_filename: {path_filename}")
+            app.logger.debug(f"FileIo::write_to_disk: path_filename: {self.path_filename}")
             # app.logger.debug(f"FileIo::write_to_disk: file_prefix: {self.file_prefix}")
 
-            if exists(path_filename):
-                with open(file=path_filename, mode="w") as file:
-                    app.logger.debug("overwriting existing file")
-                    # https://stackoverflow.com/questions/12309269/how-do-i-write-json-data-to-a-file
-                    json.dump(self.data, file, ensure_ascii=False, indent=4)
-            else:
-                # x = create and write
-                with open(file=path_filename, mode="x") as file:
-                    app.logger.debug("writing to new file")
-                    # https://stackoverflow.com/questions/12309269/how-do-i-write-json-data-to-a-file
-                    json.dump(self.data, file, ensure_ascii=False, indent=4)
+            self.store.write(
+                self,
+                content=cache_encoding.encode(self.data, encoding=encoding),
+                encoding=encoding,
+            )
         else:
             app.logger.info("Skipping write because self.data is empty")
 
-    def read_from_disk(self) -> None:
+    def read_bytes_from_disk(
+        self, accept_encodings: Collection[str] = ()
+    ) -> Tuple[Optional[bytes], str]:
+        """Return the json on disk without decoding it and its Content-Encoding
+
+        The bytes are returned compressed as stored if the encoding is one of
+        accept_encodings, else uncompressed with the encoding "".
+        Use this when the json is passed on to the patron unchanged,
+        so served_from_cache must already be true in what is stored"""
         from src import app
 
-        path_filename = self.path_filename
+        app.logger.debug(
+            f"FileIo::read_bytes_from_disk: path_filename: {self.path_filename}"
+        )
+
+        raw, encoding = self.store.read(self)
+        if raw and encoding and encoding not in accept_encodings:
+            return cache_encoding.decompress(raw, encoding=encoding), ""
+        return raw, encoding
 
-        app.logger.debug(f"FileIo::read_from_disk: path_filename: {path_filename}")
+    def read_from_disk(self) -> None:
+        from src import app
+
+        app.logger.debug(f"FileIo::read_from_disk: path_filename: {self.path_filename}")
         # app.logger.debug(f"FileIo::read_from_disk: file_prefix: {self.file_prefix}")
 
-        if exists(path_filename):
-            with open(file=path_filename) as file:
-                logger.debug("loading json into self.data")
-                self.data = json.load(file)
-                if self.data:
-                    self.data["served_from_cache"] = True
-        else:
-            logger.debug("no json on disk")
+        raw, encoding = self.store.read(self)
+        if raw:
+            logger.debug("loading json into self.data")
+            self.data = cache_encoding.decode(raw, encoding=encoding)
+            if self.data:
+                self.data["served_from_cache"] = True
+
+    @classmethod
+    def read_many_from_disk(cls, ios: Sequence["FileIo"]) -> None:
+        """Like read_from_disk() for each of the entries, in one query if the store can"""
+        if not ios:
+            return
+        for io, (raw, encoding) in zip(ios, cache_store.get_store().read_many(ios)):
+            if raw:
+                io.data = cache_encoding.decode(raw, encoding=encoding)
+                if io.data:
+                    io.data["served_from_cache"] = True
@@ -2,7 +2,6 @@ from typing import Any, Dict, List, Optional
 from urllib.parse import quote
 
 import pyalex  # type: ignore
-import requests
 from pyalex import Works  # type: ignore
 from pydantic import BaseModel
 from wikibaseintegrator import WikibaseIntegrator  # type: ignore
@@ -11,6 +10,8 @@ from wikibaseintegrator.models import Claim  # type: ignore
 from wikibaseintegrator.wbi_config import config  # type: ignore
 from wikibaseintegrator.wbi_helpers import fulltext_search  # type: ignore
 
+from src.helpers import http_client
+
 instance_of = "P31"
 retracted_item = "Q45182324"  # see https://www.wikidata.org/wiki/Q45182324
 pyalex.config.email = "info@archive.org"
@@ -188,7 +189,7 @@ class Doi(BaseModel):
     def __lookup_in_fatcat__(self):
         """DOIs in fatcat are all lowercase"""
         url = f"https://api.fatcat.wiki/v0/release/lookup?doi={self.doi.lower()}"
-        response = requests.get(url)
+        response = http_client.get(url)
         if response.status_code == 200:
             data = response.json()
             self.fatcat["id"] = data["ident"]
@@ -207,7 +208,7 @@ class Doi(BaseModel):
         """This is a fastapi frontend to elastic search"""
         query = f"doi{quote(':')}{quote(self.doi, safe='')}"
         url = f"https://scholar.archive.org/search?q={query}"
-        response = requests.get(url, headers={"Accept": "application/json"})
+        response = http_client.get(url, headers={"Accept": "application/json"})
         if response.status_code == 200:
             data = response.json()
             self.internet_archive_scholar = data
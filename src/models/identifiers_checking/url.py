@@ -3,8 +3,7 @@ import os
 import urllib.parse
 from typing import Any, Dict, Optional
 
-import requests
-
+from src.helpers import http_client
 from src.models.api.handlers import BaseHandler
 from src.models.wikimedia.wikipedia.url import WikipediaUrl
 
@@ -117,7 +116,7 @@ class Url(WikipediaUrl):
                 f"__check_url_with_testdeadlink_api__: self.url is {self.url}"
             )
 
-            response = requests.post(
+            response = http_client.post(
                 "https://iabot-api.archive.org/testdeadlink.php",
                 headers=headers,
                 data=data,
@@ -166,7 +165,7 @@ class Url(WikipediaUrl):
             "url": modified_url,
         }
 
-        response = requests.get(
+        response = http_client.get(
             endpoint,
             headers=headers,
             params=params,
@@ -208,7 +207,7 @@ class Url(WikipediaUrl):
         }
         data = f"&action=searchurldata&urls={modified_url}"
 
-        response = requests.post(
+        response = http_client.post(
             "https://iabot.wmcloud.org/api.php?wiki=enwiki",
             headers=headers,
             data=data,
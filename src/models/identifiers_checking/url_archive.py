@@ -2,8 +2,7 @@ import logging
 import urllib.parse
 from typing import Any, Dict, Optional
 
-import requests
-
+from src.helpers import http_client
 from src.models.wikimedia.wikipedia.url_archive import WikipediaUrlArchive
 
 logger = logging.getLogger(__name__)
@@ -48,7 +47,7 @@ class UrlArchive(WikipediaUrlArchive):
         }
         data = f"&action=searchurldata&urls={modified_url}"
 
-        response = requests.post(
+        response = http_client.post(
             "https://iabot.wmcloud.org/api.php?wiki=enwiki",
             headers=headers,
             data=data,
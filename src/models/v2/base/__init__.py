@@ -1,7 +1,7 @@
 import logging
 
 # from os.path import exists
-from typing import Any, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from pydantic import BaseModel, validate_arguments
 
@@ -31,3 +31,21 @@ class IariBaseModel(BaseModel):
     #     with open(file_name, "a") as f:
     #         logger.debug(f"Writing entry to {file_name}")
     #         f.write(f"{message}\n")
+
+
+class IariRecord:
+    """Base of the records we make thousands of per article when extracting
+
+    Unlike the pydantic models nothing is validated or copied when a record is made
+    and there is no per instance __dict__ because subclasses name their fields
+    in __slots__. Pydantic is kept for jobs, schemas and statistics at the API boundary."""
+
+    __slots__: Tuple[str, ...] = ()
+
+    def get_fields(self) -> Dict[str, Any]:
+        """The fields in the order of __slots__, like .dict() of a pydantic model"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={value!r}" for name, value in self.get_fields().items())
+        return f"{type(self).__name__}({fields})"
@@ -19,5 +19,5 @@ class ArticleFileIoV2(FileIo):
             raise MissingInformationError("self.job undefined")
         # we got a job, generate the iari_id
         self.job.get_mediawiki_ids()
-        filename = f"{self.job.iari_id}.json"
+        filename = f"{self.job.cache_id}.json"
         return filename
@@ -1,12 +1,13 @@
 import re
+from typing import Any, List, Optional
 from urllib.parse import quote, unquote
 
-import requests
-
-import config
-from src.models.exceptions import MissingInformationError, WikipediaApiFetchError
+from src.models.exceptions import MissingInformationError
 from src.models.v2.job import JobV2
-from src.models.wikimedia.enums import WikimediaDomain
+from src.models.wikimedia.enums import ArticleStage, WikimediaDomain
+
+# The wikitext extraction is not part of the /v2/article output so we skip it by default
+default_stages = [ArticleStage.html, ArticleStage.ores]
 
 
 class ArticleJobV2(JobV2):
@@ -25,6 +26,12 @@ class ArticleJobV2(JobV2):
     sections: str = ""
     revision: int = 0  # this is named just as in the MediaWiki API
     dehydrate: bool = True
+    stages: List[ArticleStage] = default_stages
+    pretty_html: bool = False  # indent cite_html and span_html, see tag_html()
+    omit_html: bool = False  # leave cite_html and span_html out
+
+    # WikipediaArticleSourceV2, we set to Any here because of cyclic dependency
+    source: Optional[Any] = None
 
     @property
     def iari_id(self) -> str:
@@ -37,6 +44,29 @@ class ArticleJobV2(JobV2):
             raise MissingInformationError()
         return f"{self.lang}.{self.domain.value}.{self.page_id}.{self.revision}"
 
+    @property
+    def cache_id(self) -> str:
+        """The iari_id followed by the stages that ran if they are not the default ones
+        and the html format
+
+        The html format is always there, files of older versions are named by the
+        plain iari_id and have pretty html, maybe of another revision than the
+        iari_id, so we do not read them anymore"""
+        options = []
+        stages = [stage for stage in ArticleStage if stage in self.stages]
+        if stages != [stage for stage in ArticleStage if stage in default_stages]:
+            options.append("-".join(stage.value for stage in stages) or "none")
+        if self.omit_html:
+            options.append("nohtml")
+        elif self.pretty_html:
+            options.append("pretty")
+        else:
+            options.append("compact")
+        return ".".join([self.iari_id] + options)
+
+    def runs(self, stage: ArticleStage) -> bool:
+        return stage in self.stages
+
     @property
     def quoted_title(self):
         if not self.title:
@@ -56,30 +86,30 @@ class ArticleJobV2(JobV2):
             )
             if not self.lang or not self.title or not self.domain:
                 raise MissingInformationError("url lang, title or domain not found")
+            self.fetch_source()
+
+    def fetch_source(self) -> Any:
+        """Fetch page id, revision, timestamp and wikitext once and keep them in self.source
+
+        Copies of this job (pydantic copies models passed to other models)
+        share the same source object so nothing is fetched twice."""
+        from src.models.v2.wikimedia.wikipedia.article_source_v2 import (
+            WikipediaArticleSourceV2,
+        )
 
-            # https://stackoverflow.com/questions/31683508/wikipedia-mediawiki-api-get-pageid-from-url
-            wiki_fetch_url = (
-                f"https://{self.lang}.{self.domain.value}/"
-                f"w/rest.php/v1/page/{self.quoted_title}"
+        if not self.source:
+            self.source = WikipediaArticleSourceV2(
+                lang=self.lang,
+                domain=self.domain,
+                title=self.title,
+                # We only pin the revision if the patron specified one
+                revision=self.revision,
             )
-            headers = {"User-Agent": config.user_agent}
-            response = requests.get(wiki_fetch_url, headers=headers)
-            # console.print(response.json())
-            if response.status_code == 200:
-                data = response.json()
-                # We only set this if the patron did not specify a revision they want
-                if not self.revision:
-                    self.revision = int(data["latest"]["id"])
-                self.page_id = int(data["id"])
-
-            elif response.status_code == 404:
-                app.logger.error(
-                    f"Could not fetch page data from {self.domain} because of 404. See {wiki_fetch_url}"
-                )
-            else:
-                raise WikipediaApiFetchError(
-                    f"Could not fetch page data. Got {response.status_code} from {wiki_fetch_url}"
-                )
+        self.source.fetch_wikitext()
+        if self.source.found_in_wikipedia:
+            self.revision = self.source.revision
+            self.page_id = self.source.page_id
+        return self.source
 
     def __urldecode_url__(self):
         """We decode the title to have a human readable string to pass around"""
@@ -1,9 +1,10 @@
 import logging
 
-from marshmallow import fields, post_load
+from marshmallow import fields, post_load, pre_load, validate
 
 from src.models.v2.job.article_job_v2 import ArticleJobV2
 from src.models.v2.schema import BaseSchemaV2
+from src.models.wikimedia.enums import ArticleStage
 
 logger = logging.getLogger(__name__)
 
@@ -13,9 +14,28 @@ class ArticleSchemaV2(BaseSchemaV2):
     #   additional default parameters are defined in BaseSchemV2
     # WTF: are these marshmallow style declarations?
     url = fields.Str(required=True)
+    revision = fields.Int(required=False)
     reference_types = fields.Str(required=False)
     url_details = fields.Bool(required=False)
     url_method = fields.Str(required=False)
+    stages = fields.List(
+        fields.Str(validate=validate.OneOf([stage.value for stage in ArticleStage])),
+        required=False,
+    )  # e.g. html,ores,wikitext
+    pretty_html = fields.Bool(required=False)
+    omit_html = fields.Bool(required=False)
+
+    # noinspection PyUnusedLocal
+    @pre_load
+    # **kwargs is needed here despite what the validator claims
+    def process_input(self, data, **kwargs):  # dead: disable
+        """Transform comma separated stages into a List"""
+        mutable_data = dict(data)  # Convert ImmutableMultiDict to a mutable dict
+        if "stages" in mutable_data and isinstance(mutable_data["stages"], str):
+            mutable_data["stages"] = [
+                stage.strip() for stage in mutable_data["stages"].split(",") if stage.strip()
+            ]
+        return mutable_data
 
     # noinspection PyUnusedLocal
     @post_load
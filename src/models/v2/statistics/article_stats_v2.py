@@ -33,12 +33,12 @@ class ArticleStatisticsV2(BaseModel):
 
     ores_score: Any = {}
 
-    reference_count: int = 0,
-    reference_stats: Dict[str, Any] = {},
-    references: List[Dict[str, Any]] = [],
-    url_count: int = 0,
-    url_stats: Dict[str, Any] = {},
-    urls: List[str] = [],
+    reference_count: int = 0
+    reference_stats: Dict[str, Any] = {}
+    references: List[Dict[str, Any]] = []
+    url_count: int = 0
+    url_stats: Dict[str, Any] = {}
+    urls: List[str] = []
 
     # ores_score: Any = {}
     #
@@ -54,3 +54,18 @@ class ArticleStatisticsV2(BaseModel):
 
     class Config:  # dead: disable
         extra = Extra.forbid  # dead: disable
+
+    @classmethod
+    def build_dict(cls, **fields: Any) -> Dict[str, Any]:
+        """Return what ArticleStatisticsV2(**fields).dict() returns without validating or copying
+
+        The references of a large article are thousands of nested dicts,
+        pydantic validated and then deep-copied all of them for every article.
+        The values are used as they are so tests check that the output conforms to this model."""
+        unknown_fields = fields.keys() - cls.__fields__.keys()
+        if unknown_fields:
+            raise ValueError(f"ArticleStatisticsV2 has no fields {sorted(unknown_fields)}")
+        return {
+            name: fields[name] if name in fields else field.get_default()
+            for name, field in cls.__fields__.items()
+        }
@@ -30,7 +30,7 @@ class WikipediaAnalyzerV2(IariBaseModel):
     job: Optional[ArticleJobV2] = None
     article: Optional[WikipediaArticleV2] = None
 
-    article_statistics: Optional[ArticleStatisticsV2] = None
+    article_statistics: Optional[Dict[str, Any]] = None  # see ArticleStatisticsV2
     reference_statistics: Optional[List[Dict[str, Any]]] = None
 
     @property
@@ -51,11 +51,9 @@ class WikipediaAnalyzerV2(IariBaseModel):
             raise MissingInformationError("self.article was None")
         return self.article.found_in_wikipedia
 
-    # returns dict of article data ( self.article_statistics.dict() )
+    # returns dict of article data ( self.article_statistics )
     def get_article_data(self) -> Dict[str, Any]:
 
-        # NB WTF TODO the goal: return self.article_statistics.dict()
-
         self.__get_article_object__()  # sets self.article
 
         if self.article:
@@ -67,9 +65,9 @@ class WikipediaAnalyzerV2(IariBaseModel):
             # # populate self.reference_statistics
             # self.__gather_reference_statistics__()
 
-        # return dict of data
+        # return dict of data, a shallow copy because the view updates the time information
         if self.article_statistics:
-            return self.article_statistics.dict()
+            return dict(self.article_statistics)
         else:
             return {}
 
@@ -130,15 +128,13 @@ class WikipediaAnalyzerV2(IariBaseModel):
 
         # ae = self.article.extractor
 
-        # WTF? shouldn't this have already been done, extracting the wiki id data from the article meta info?
-        if not self.job.page_id:
-            self.job.get_mediawiki_ids()
-
-        self.article_statistics = ArticleStatisticsV2(
+        # this is ArticleStatisticsV2(...).dict() without validating and copying the references
+        self.article_statistics = ArticleStatisticsV2.build_dict(
 
             iari_version=get_poetry_version("pyproject.toml"),
 
-            iari_id=self.job.iari_id,
+            # the article's job holds the page id and revision resolved by the source stage
+            iari_id=self.article.job.iari_id,
 
             lang=self.job.lang,
             site=self.job.domain.value,
@@ -0,0 +1,127 @@
+import logging
+from datetime import datetime
+from typing import Optional
+from urllib.parse import quote
+
+from dateutil.parser import isoparse
+
+from src.helpers import http_client
+from src.models.exceptions import MissingInformationError, WikipediaApiFetchError
+from src.models.v2.base import IariBaseModel
+from src.models.wikimedia.enums import WikimediaDomain
+
+logger = logging.getLogger(__name__)
+
+
+class WikipediaArticleSourceV2(IariBaseModel):
+    """Fetches the raw material for one revision of an article from the MediaWiki REST v1 API
+
+    One request resolves page id, revision, revision date and wikitext
+    and one more request fetches the Parsoid html of that same revision.
+
+    The job keeps this object and hands it on to the file io and the article,
+    so for one article we never ask MediaWiki for the same thing twice.
+    """
+
+    lang: str = "en"
+    domain: WikimediaDomain = WikimediaDomain.wikipedia
+    title: str = ""
+    revision: int = 0  # the revision the patron wants, 0 means latest
+
+    page_id: int = 0
+    revision_isodate: Optional[datetime] = None
+    revision_timestamp: int = 0
+    wikitext: str = ""
+    html_markup: str = ""
+
+    found_in_wikipedia: bool = True
+    wikitext_fetched: bool = False
+    html_fetched: bool = False
+
+    @property
+    def quoted_title(self):
+        if not self.title:
+            raise MissingInformationError("self.title was empty")
+        return quote(self.title, safe="")
+
+    @property
+    def __base_url__(self) -> str:
+        return f"https://{self.lang}.{self.domain.value}/w/rest.php/v1"
+
+    def fetch_wikitext(self) -> None:
+        """Fetch page id, revision, timestamp and wikitext in one request"""
+        from src import app
+
+        if self.wikitext_fetched:
+            return
+        if not self.lang or not self.title or not self.domain:
+            raise MissingInformationError("url lang, title or domain not found")
+
+        if self.revision:
+            # https://en.wikipedia.org/w/rest.php/v1/revision/1234
+            url = f"{self.__base_url__}/revision/{self.revision}"
+        else:
+            # This is needed to support e.g. https://en.wikipedia.org/wiki/Musk%C3%B6_naval_base or
+            # https://en.wikipedia.org/wiki/GNU/Linux_naming_controversy
+            url = f"{self.__base_url__}/page/{self.quoted_title}"
+
+        app.logger.debug(f"WikipediaArticleSourceV2::fetch_wikitext: {url}")
+        response = http_client.get(url)
+        if response.status_code == 200:
+            data = response.json()
+            if self.revision:
+                self.page_id = int(data["page"]["id"])
+                timestamp = data["timestamp"]
+            else:
+                self.page_id = int(data["id"])
+                self.revision = int(data["latest"]["id"])
+                timestamp = data["latest"]["timestamp"]
+            self.revision_isodate = isoparse(timestamp)
+            self.revision_timestamp = round(self.revision_isodate.timestamp())
+            self.wikitext = data["source"]
+
+        elif response.status_code == 404:
+            self.found_in_wikipedia = False
+            app.logger.error(
+                f"Could not fetch page data from {self.domain.name} because of 404. See {url}"
+            )
+        else:
+            raise WikipediaApiFetchError(
+                f"Could not fetch page data. Got {response.status_code} from {url}"
+            )
+        self.wikitext_fetched = True
+
+    def fetch_html(self) -> None:
+        """Fetch the Parsoid html of the revision we fetched the wikitext of
+
+        We never fetch the html of the latest revision of the page because
+        it could be newer than the revision in the iari_id we store the result under"""
+        from src import app
+
+        if self.html_fetched:
+            return
+        if not self.revision:
+            self.fetch_wikitext()
+        if not self.revision:
+            raise MissingInformationError("no revision to fetch the html of")
+
+        # example request url for html source:
+        # https://en.wikipedia.org/w/rest.php/v1/revision/1234/with_html
+        url = f"{self.__base_url__}/revision/{self.revision}/with_html"
+
+        app.logger.debug(f"WikipediaArticleSourceV2::fetch_html: {url}")
+        response = http_client.get(url)
+        if response.status_code == 200:
+            data = response.json()
+            if int(data.get("id", self.revision)) != self.revision:
+                raise WikipediaApiFetchError(
+                    f"Got the html of revision {data['id']} instead of {self.revision} from {url}"
+                )
+            self.html_markup = data["html"]
+
+        else:
+            # without the html we would return and cache an article without references
+            raise WikipediaApiFetchError(
+                f"Could not fetch page html. Got {response.status_code} from {url}"
+            )
+        self.html_fetched = True
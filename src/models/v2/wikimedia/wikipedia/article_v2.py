@@ -1,25 +1,24 @@
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import unquote
 
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 import json
 
-import requests
-
 # from pydantic import validate_arguments
 from bs4 import BeautifulSoup
-from dateutil.parser import isoparse
 
-import config
+from iarilib.parse_utils import parse_reference_subtrees, tag_html
+from src.helpers import http_client
 from src.models.exceptions import MissingInformationError, WikipediaApiFetchError
 from src.models.v2.base import IariBaseModel
 from src.models.v2.job.article_job_v2 import ArticleJobV2
 from src.models.v2.wikimedia.wikipedia.reference.extractor_v2 import (
     WikipediaReferenceExtractorV2,
 )
-from src.models.wikimedia.enums import WikimediaDomain
+from src.models.wikimedia.enums import ArticleStage, WikimediaDomain
 
 logger = logging.getLogger(__name__)
 
@@ -57,6 +56,8 @@ class WikipediaArticleV2(IariBaseModel):
 
     wikitext: Optional[str]
     html_markup: Optional[str]
+    html_soup: Optional[BeautifulSoup] = None  # html_markup parsed once and shared by all html extractors
+    parse_full_html: bool = False  # build the DOM of the whole article instead of only the reference parts
 
     ores_quality_prediction: str = ""
     ores_details: Dict = {}
@@ -155,42 +156,71 @@ class WikipediaArticleV2(IariBaseModel):
             raise WikipediaApiFetchError("wikitext is empty")
 
 
-        # wikitext extraction
-
-        app.logger.debug("==> ArticleV2::fetch_and_parse: extracting from wikitext")
-
-        # elif not self.is_redirect and self.found_in_wikipedia:
-        if not self.is_redirect and self.found_in_wikipedia:
-
-            if not self.wikitext:
-                raise MissingInformationError("WikipediaReferenceExtractorV2::fetch_and_parse: self.wikitext is empty")
-
-            self.extractor = WikipediaReferenceExtractorV2(
-                wikitext=self.wikitext,
-                html_source=self.html_markup,
-                job=self.job,
+        # The html and the ores score only depend on the revision id which we know by now,
+        # so we download them in the background while extracting from the wikitext.
+        # Only the stages selected in the job run, see ArticleStage
+        app.logger.debug(
+            f"==> ArticleV2::fetch_and_parse: running stages {[stage.value for stage in self.job.stages]}"
+        )
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            html_future = (
+                executor.submit(self.__fetch_html__)
+                if self.job.runs(ArticleStage.html) and not self.html_markup
+                else None
+            )
+            ores_future = (
+                executor.submit(self.__get_ores_scores__)
+                if self.job.runs(ArticleStage.ores)
+                else None
             )
 
-            app.logger.debug("==> ArticleV2::fetch_and_parse: extracting all refs")
-            self.extractor.extract_all_references()
-
-        app.logger.debug("==> ArticleV2::fetch_and_parse: fetching ores scores")
-        self.__get_ores_scores__()
-        # self.__generate_hash__()
+            if self.job.runs(ArticleStage.wikitext):
+                # wikitext extraction
+                app.logger.debug("==> ArticleV2::fetch_and_parse: extracting from wikitext")
+                self.extractor = WikipediaReferenceExtractorV2(
+                    wikitext=self.wikitext,
+                    job=self.job,
+                    language_code=self.job.lang,
+                )
+                app.logger.debug("==> ArticleV2::fetch_and_parse: extracting all refs")
+                self.extractor.extract_all_references()
 
+            # result() re-raises any exception from the fetches
+            if html_future:
+                html_future.result()
+            if ores_future:
+                ores_future.result()
 
-        app.logger.debug("==> ArticleV2::fetch_and_parse: extracting from html")
+        if not self.job.runs(ArticleStage.html):
+            return
 
         # html extraction
-        if not self.html_markup:
-            self.__fetch_html__()
+        app.logger.debug("==> ArticleV2::fetch_and_parse: extracting from html")
+        self.__parse_html__()
+        if self.extractor:
+            self.extractor.html_source = self.html_markup
+            self.extractor.html_soup = self.html_soup
+            self.extractor.__parse_html_source__()
 
         # extract references from html point-of-view
         self.__extract_footnote_references__()
         self.__extract_section_references__()
         self.__extract_urls_from_references__()
 
-        # self.__get_ores_scores__()  # fills ores_quality_prediction and ores_details
+    def __parse_html__(self):
+        """Parse the html once with the fast lxml parser
+
+        By default only the subtrees we extract references from are parsed,
+        see parse_reference_subtrees()"""
+        if self.html_soup is None:
+            if self.parse_full_html:
+                self.html_soup = BeautifulSoup(self.html_markup or "", "lxml")
+            else:
+                self.html_soup = parse_reference_subtrees(self.html_markup or "")
+
+    def __tag_html__(self, tag) -> Optional[str]:
+        """The html of a tag, compact unless the patron asked for pretty html or none at all"""
+        return tag_html(tag, pretty_html=self.job.pretty_html, omit_html=self.job.omit_html)
 
     def __extract_urls_from_references__(self):
         # traverse references, adding urls to self.urlDict,
@@ -226,10 +256,8 @@ class WikipediaArticleV2(IariBaseModel):
 
         regex_extract_ref_name = r"#cite_note-(.*?)-\d+$"
 
-        soup = BeautifulSoup(self.html_markup, "html.parser")
-        # for link in soup.find_all("a"):
-        #     print(link.get("href"))
-
+        self.__parse_html__()
+        soup = self.html_soup
 
         references_wrapper = soup.find("div", class_="mw-references-wrap")
 
@@ -305,7 +333,7 @@ class WikipediaArticleV2(IariBaseModel):
                     cite = span_ref.find("cite")
 
                     if cite:
-                        cite_html = cite.prettify()
+                        cite_html = self.__tag_html__(cite)
                         # extract urls from <a> tags from <cite>
                         a_tags = cite.find_all('a')
                         # urls = [a.get('href') for a in a_tags]
@@ -338,7 +366,7 @@ class WikipediaArticleV2(IariBaseModel):
 
                 # if cite_html was not found, use span_ref as html source...
                 if not cite_html:
-                    span_html = span_ref.prettify()
+                    span_html = self.__tag_html__(span_ref)
 
 
                 # accumulate template_names
@@ -371,11 +399,8 @@ class WikipediaArticleV2(IariBaseModel):
 
     def __extract_section_references__(self):
 
-        soup = BeautifulSoup(self.html_markup, "html.parser")
-            # for link in soup.find_all("a"):
-            #     print(link.get("href"))
-
-        sections = soup.find_all('section')
+        self.__parse_html__()
+        sections = self.html_soup.find_all('section')
 
         # Iterate through sections to find the one with child of interest
         for section in sections:
@@ -428,7 +453,7 @@ class WikipediaArticleV2(IariBaseModel):
                 # extract entire <cite> html
                 cite = ref.find("cite")
                 if cite:
-                    cite_html = cite.prettify()
+                    cite_html = self.__tag_html__(cite)
                     # extract urls from <a> tags from <cite>
                     a_tags = cite.find_all('a')
                     # urls = [a.get('href') for a in a_tags]
@@ -539,17 +564,20 @@ class WikipediaArticleV2(IariBaseModel):
         return span_template
 
     def __fetch_wikitext__(self) -> None:
-        """This fetches metadata and the latest revision id
-        and date from the MediaWiki REST v1 API if needed"""
+        """This gets metadata, the revision id and date and the wikitext
+        from the source stage of the job which fetches them only once"""
         from src import app
 
         app.logger.debug("WikipediaArticleV2::__fetch_wikitext__")
         self.__check_if_title_is_empty__()
         if not self.wikitext:
-            if self.revision_id:
-                self.__fetch_data_for_specific_revision__()
-            else:
-                self.__fetch_data_for_latest_revision__()
+            source = self.job.fetch_source()
+            self.found_in_wikipedia = source.found_in_wikipedia
+            if self.found_in_wikipedia:
+                self.page_id = source.page_id
+                self.revision_isodate = source.revision_isodate
+                self.revision_timestamp = source.revision_timestamp
+                self.wikitext = source.wikitext
 
         else:
             logger.info(
@@ -557,15 +585,15 @@ class WikipediaArticleV2(IariBaseModel):
             )
 
     def __fetch_html__(self) -> None:
-        """This fetches metadata and the latest revision id
-        and date from the MediaWiki REST v1 API if needed"""
+        """This gets the html of the article from the source stage of the job"""
         from src import app
 
         app.logger.debug("WikipediaArticleV2::__fetch_html__")
         self.__check_if_title_is_empty__()
 
-        # fetch html page data - sets self.html_markup
-        self.__fetch_page_html__(self.revision_id)
+        source = self.job.fetch_source()
+        source.fetch_html()
+        self.html_markup = source.html_markup
 
     def __check_if_title_is_empty__(self):
         if not self.job.title:
@@ -588,7 +616,7 @@ class WikipediaArticleV2(IariBaseModel):
             #   https://ores.wikimedia.org/v3/scores/enwiki/234234320/articlequality
             # We only support Wikipedia for now
             wiki_project = f"{self.job.lang}wiki"
-            response = requests.get(
+            response = http_client.get(
                 f"https://ores.wikimedia.org/v3/scores/"
                 f"{wiki_project}/{self.revision_id}/articlequality"
             )
@@ -604,116 +632,3 @@ class WikipediaArticleV2(IariBaseModel):
 
             else:
                 app.logger.debug("Error:", response.status_code)
-
-    def __fetch_data_for_specific_revision__(self):
-        """Get wikitext for a specific revision
-
-        Action-specific parameters
-
-        titles= takes one or more titles for the query to operate on.
-
-        pageids= takes one or more page ids for the query to operate on. revids= takes a list of revision IDs to work on.
-        """
-        from src import app
-
-        app.logger.debug("__fetch_data_for_specific_revision__: running")
-        url = (
-            f"https://{self.job.lang}.{self.job.domain.value}/"
-            f"w/rest.php/v1/revision/{self.job.revision}"
-        )
-
-        prop = "ids|timestamp|content"
-        headers = {"User-Agent": config.user_agent}
-        response = requests.get(
-            url, params={"action": "query", "prop": prop}, headers=headers
-        )
-        # console.print(response.json())
-        if response.status_code == 200:
-            app.logger.debug("returned article data with prop: ids|timestamp|content")
-
-            data = response.json()
-            # self.revision_timestamp = data["timestamp"]
-            self.revision_isodate = isoparse(data["timestamp"])
-            self.revision_timestamp = round(self.revision_isodate.timestamp())
-            self.page_id = data["page"]["id"]
-            # logger.debug(f"Got pageid: {self.page_id}")
-            self.wikitext = data["source"]
-
-        elif response.status_code == 404:
-            self.found_in_wikipedia = False
-            logger.error(
-                f"Could not fetch page data from {self.wikimedia_domain.name} because of 404. See {url}"
-            )
-        else:
-            raise WikipediaApiFetchError(
-                f"Could not fetch page data. Got {response.status_code} from {url}"
-            )
-
-    def __fetch_data_for_latest_revision__(self):
-        # This is needed to support e.g. https://en.wikipedia.org/wiki/Musk%C3%B6_naval_base or
-        # https://en.wikipedia.org/wiki/GNU/Linux_naming_controversy
-        from src import app
-
-        url = (
-            f"https://{self.job.lang}.{self.job.domain.value}/"
-            f"w/rest.php/v1/page/{self.job.quoted_title}"
-        )
-        headers = {"User-Agent": config.user_agent}
-        response = requests.get(url, headers=headers)
-        # console.print(response.json())
-        if response.status_code == 200:
-            data = response.json()
-            self.job.revision = int(data["latest"]["id"])
-            self.revision_isodate = isoparse(data["latest"]["timestamp"])
-            self.revision_timestamp = round(self.revision_isodate.timestamp())
-            self.page_id = int(data["id"])
-            # logger.debug(f"Got pageid: {self.page_id}")
-            self.wikitext = data["source"]
-
-        elif response.status_code == 404:
-            self.found_in_wikipedia = False
-            app.logger.error(
-                f"Could not fetch page data from {self.wikimedia_domain.name} because of 404. See {url}"
-            )
-        else:
-            raise WikipediaApiFetchError(
-                f"Could not fetch page data. Got {response.status_code} from {url}"
-            )
-
-    def __fetch_page_html__(self, revision_id=0):
-        """
-        Get html for wiki page as specified by
-        """
-        from src import app
-
-        app.logger.debug(
-            f"WikipediaArticleV2::__fetch_page_html__, revision_id is {revision_id}"
-        )
-
-        # example request url for html source:
-        # https://en.wikipedia.org/w/rest.php/v1/page/Earth/with_html
-        url = (
-            f"https://{self.job.lang}.{self.job.domain.value}/"
-            f"w/rest.php/v1/page/{self.job.quoted_title}/with_html"
-        )
-
-        headers = {"User-Agent": config.user_agent}
-        response = requests.get(url, headers=headers)
-
-        # console.print(response.json())
-        if response.status_code == 200:
-
-            data = response.json()
-            self.html_markup = data["html"]
-
-        elif response.status_code == 404:
-            # self.found_in_wikipedia = False
-            logger.error(
-                f"Could not fetch page html from {self.wikimedia_domain.name} because of 404. See {url}"
-            )
-            # NB TODO how to error here?
-        else:
-            raise WikipediaApiFetchError(
-                f"Could not fetch page html. Got {response.status_code} from {url}"
-            )
-            # NB TODO how to error here?
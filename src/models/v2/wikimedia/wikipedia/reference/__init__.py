@@ -1,30 +1,61 @@
 import hashlib
+import json
 import logging
 import re
-from typing import Any, Dict, List, Optional, Union
+from collections import OrderedDict
+from copy import copy
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
-from bs4 import BeautifulSoup, Comment
-from mwparserfromhell.nodes import Tag  # type: ignore
+from mwparserfromhell.nodes import Tag, Template  # type: ignore
 from mwparserfromhell.wikicode import Wikicode  # type: ignore
 
 from config import regex_url_link_extraction
-from src.models.base.job import JobBaseModel
+from iarilib.parse_utils import extract_comments, extract_ref_name
+from src.helpers import reference_cache
 from src.models.exceptions import MissingInformationError
+from src.models.v2.base import IariRecord
 from src.models.v2.wikimedia.wikipedia.reference.template import WikipediaTemplateV2
 from src.models.v2.wikimedia.wikipedia.url_v2 import WikipediaUrlV2
 from src.models.wikimedia.wikipedia.reference.enums import (
     FootnoteSubtype,
     ReferenceType,
+    UrlOrigin,
 )
 
 logger = logging.getLogger(__name__)
 
+# Bump this when the extraction of templates or urls or the cached fields change
+# so that references in the reference cache are extracted again
+EXTRACTOR_VERSION = "3"
+# What the reference cache stores for a reference, the other fields are
+# given when the reference is created or are cheap to get from the wikicode
+cached_fields = (
+    "templates",
+    "multiple_templates_found",
+    "extraction_done",
+    "is_named_reused_reference",
+    "wikicoded_links",
+    "bare_urls",
+    "template_urls",
+    "reference_urls",
+    "comment_urls",
+    "url_origins",
+    "unique_first_level_domains",
+)
+# The cached fields that hold urls
+url_fields = (
+    "wikicoded_links",
+    "bare_urls",
+    "template_urls",
+    "reference_urls",
+    "comment_urls",
+)
 
 # We use marshmallow here because pydantic did not seem to support optional alias fields.
 # https://github.com/samuelcolvin/pydantic/discussions/3855
 
 
-class WikipediaReferenceV2(JobBaseModel):
+class WikipediaReferenceV2(IariRecord):
     """This models any page_reference on a Wikipedia page
 
     As we move to support more than one Wikipedia this model should be generalized further.
@@ -32,61 +63,65 @@ class WikipediaReferenceV2(JobBaseModel):
     Do we want to merge page + pages into a string property like in Wikidata?
     How do we handle parse errors? In a file log? Should we publish the log for Wikipedians to fix?
 
-    Validation works better with pydantic so we validate when creating this object
+    This is a light record without validation because thousands are made per article
 
     Support date ranges like "May-June 2011"? See https://stackoverflow.com/questions/10340029/
     """
 
-    testing: bool = False
-
-    wikicode: Union[Tag, Wikicode]  # output from mwparserfromhell
-    templates: Optional[List[WikipediaTemplateV2]] = None
-
-    multiple_templates_found: bool = False
-    extraction_done: bool = False
-    is_named_reused_reference: bool = False
-    is_general_reference: bool = False
-
-    wikicoded_links: Optional[List[WikipediaUrlV2]] = None
-    bare_urls: Optional[List[WikipediaUrlV2]] = None
-    template_urls: Optional[List[WikipediaUrlV2]] = None
-    reference_urls: Optional[List[WikipediaUrlV2]] = None
-    comment_urls: Optional[List[WikipediaUrlV2]] = None
-
-    unique_first_level_domains: Optional[List[str]] = None
-    language_code: str = ""
-    reference_id: str = ""
-    section: str
-
-    soup: Optional[Any] = None
-    comments: Optional[List[Comment]] = None  # TODO remove comments???
-
-    # TODO REMOVE ref_counter_index: int = 0
-
-    class Config:  # dead: disable
-        arbitrary_types_allowed = True  # dead: disable
+    __slots__ = (
+        "testing",
+        "wikicode",
+        "templates",
+        "multiple_templates_found",
+        "extraction_done",
+        "is_named_reused_reference",
+        "is_general_reference",
+        "wikicoded_links",
+        "bare_urls",
+        "template_urls",
+        "reference_urls",
+        "comment_urls",
+        "url_origins",
+        "unique_first_level_domains",
+        "language_code",
+        "reference_id",
+        "wikitext_hash",
+        "section",
+        "comments",
+    )
+
+    def __init__(
+        self,
+        wikicode: Union[Tag, Wikicode],  # output from mwparserfromhell
+        section: str,
+        testing: bool = False,
+        language_code: str = "",
+        is_general_reference: bool = False,
+    ):
+        self.testing = testing
+        self.wikicode = wikicode
+        self.templates: Optional[List[WikipediaTemplateV2]] = None
+        self.multiple_templates_found = False
+        self.extraction_done = False
+        self.is_named_reused_reference = False
+        self.is_general_reference = is_general_reference
+        self.wikicoded_links: Optional[List[WikipediaUrlV2]] = None
+        self.bare_urls: Optional[List[WikipediaUrlV2]] = None
+        self.template_urls: Optional[List[WikipediaUrlV2]] = None
+        self.reference_urls: Optional[List[WikipediaUrlV2]] = None
+        self.comment_urls: Optional[List[WikipediaUrlV2]] = None
+        # where each raw url was found
+        self.url_origins: Optional[Dict[str, List[UrlOrigin]]] = None
+        self.unique_first_level_domains: Optional[List[str]] = None
+        self.language_code = language_code
+        self.reference_id = ""
+        self.wikitext_hash = ""  # md5 of the wikitext, reference_id is the start of it
+        self.section = section
+        self.comments: Optional[List[str]] = None
 
     @property
     def get_name(self) -> str:
-        if not self.soup:
-            raise MissingInformationError()
-        # Find the <ref> tag
-        ref_tag = self.soup.find("ref")
-        if ref_tag:
-            # Extract the value of the 'name' attribute
-            name = str(ref_tag.get("name"))  # type: ignore # see https://github.com/python/typeshed/issues/8356
-            if name.endswith("\\"):
-                # Cut off the trailing backward slash
-                name = name[:-1]
-            if name.endswith("/"):
-                # Cut off the trailing forward slash
-                name = name[:-1]
-            if name == "None" or name is None:
-                return ""
-            else:
-                return name
-        else:
-            return ""
+        return extract_ref_name(self.wikicode)
 
     @property
     def reference_type(self) -> Optional[ReferenceType]:
@@ -172,82 +207,61 @@ class WikipediaReferenceV2(JobBaseModel):
             return 0
         return len(self.templates)
 
-    def __parse_xhtml__(self):
-        self.soup = BeautifulSoup(str(self.wikicode), "lxml")
+    def __extract_reference_urls__(self) -> None:
+        """We support URLs in templates, bare URLs outside templates and wikicoded links
 
-    def __extract_template_urls__(self) -> None:
+        The templates give their urls, the wikicoded links and bare urls are
+        harvested from the wikicode, see __harvest_urls_from_wikicode__().
+        Every distinct url is extracted only once"""
         self.template_urls = []
-        urls = []
         if self.templates:
             for template in self.templates:
-                if template.urls:
-                    urls.extend(template.urls)
-        self.template_urls = urls
-
-    def __extract_bare_urls_outside_templates__(self) -> None:
-        """This is a slightly more sophisticated and slower search for bare URLs using a regex"""
-        self.bare_urls = []
-        urls = []
-        for url in self.__find_bare_urls_outside_templates__():
-            url_object = WikipediaUrlV2(url=url)
-            url_object.extract()
-            urls.append(url_object)
-        self.bare_urls = urls
-
-    # Disabled because it does not work. See todo
-    # def __extract_urls_from_comments__(self):
-    #     urls = []
-    #     for url in self.__find_bare_urls_in_comments__():
-    #         url_object = WikipediaUrl(url=url)
-    #         url_object.extract()
-    #         urls.append(url_object)
-    #     self.comment_urls = urls
-
-    def __extract_external_wikicoded_links_from_the_reference__(self) -> None:
-        """This relies on mwparserfromhell to find links like [google.com Google] in the wikitext"""
-        self.wikicoded_links = []
-        urls = set()
-        if isinstance(self.wikicode, Wikicode):
-            for url in self.wikicode.ifilter_external_links():
-                # url: ExternalLink
-                # we throw away the title here
-                url = WikipediaUrlV2(url=str(url.url))
-                url.extract()
-                urls.add(url)
-        else:
-            for url in self.wikicode.contents.ifilter_external_links():
-                # url: ExternalLink
-                # we throw away the title here
-                url = WikipediaUrlV2(url=str(url.url))
-                url.extract()
-                urls.add(url)
-        self.wikicoded_links = list(urls)
+                self.template_urls.extend(template.urls)
+        bare_urls, wikicoded_links = self.__harvest_urls_from_wikicode__()
+
+        self.url_origins = {}
+        for origin, raw_urls in (
+            (UrlOrigin.TEMPLATE, [url.url for url in self.template_urls]),
+            (UrlOrigin.BARE, bare_urls),
+            (UrlOrigin.WIKICODED, wikicoded_links),
+        ):
+            for raw_url in raw_urls:
+                origins = self.url_origins.setdefault(raw_url, [])
+                if origin not in origins:
+                    origins.append(origin)
+
+        # the template urls were already extracted by the templates
+        urls = {url.url: url for url in self.template_urls}
+        for url in WikipediaUrlV2.extract_many(
+            [raw_url for raw_url in self.url_origins if raw_url not in urls]
+        ):
+            urls[url.url] = url
+        self.bare_urls = [urls[raw_url] for raw_url in bare_urls]
+        self.wikicoded_links = list(set(urls[raw_url] for raw_url in wikicoded_links))
 
-    def __extract_reference_urls__(self) -> None:
-        """We support both URLs in templates and outside aka bare URLs"""
-        urls_list = []
-
-        if not self.template_urls:
-            self.__extract_template_urls__()
-        if self.template_urls:
-            urls_list.extend(self.template_urls)
-
-        if not self.bare_urls:
-            self.__extract_bare_urls_outside_templates__()
-        if self.bare_urls:
-            urls_list.extend(self.bare_urls)
-
-        if not self.wikicoded_links:
-            self.__extract_external_wikicoded_links_from_the_reference__()
-        if self.wikicoded_links:
-            urls_list.extend(self.wikicoded_links)
-
-        # if not self.comment_urls:
-        #     self.__extract_urls_from_comments__()
-        # urls_list.extend(self.comment_urls)
         # We set it to avoid duplicates
+        self.reference_urls = list(
+            set(self.template_urls + self.bare_urls + self.wikicoded_links)
+        )
 
-        self.reference_urls = list(set(urls_list))
+    def __harvest_urls_from_wikicode__(self) -> Tuple[List[str], List[str]]:
+        """Return the raw bare urls and the wikicoded links of the reference
+
+        The wikicoded links come from one walk over the external links.
+        Bare urls are searched for with a regex in strip_code() of the wikitext,
+        a second pass, so urls in templates are left out.
+        Like before we only do that for general references and not for <ref> tags."""
+        if isinstance(self.wikicode, Wikicode):
+            wikicode = self.wikicode
+        else:
+            wikicode = self.wikicode.contents
+        # we throw away the titles here
+        wikicoded_links = [str(link.url) for link in wikicode.ifilter_external_links()]
+        if not isinstance(self.wikicode, Wikicode):
+            return [], wikicoded_links
+        stripped_wikicode = str(self.wikicode.strip_code())
+        logger.debug(stripped_wikicode)
+        return re.findall(regex_url_link_extraction, stripped_wikicode), wikicoded_links
 
     def __extract_unique_first_level_domains__(self) -> None:
         """This aggregates all first level domains from the urls found in the urls"""
@@ -289,18 +303,6 @@ class WikipediaReferenceV2(JobBaseModel):
     #     else:
     #         return True
 
-    def __find_bare_urls_outside_templates__(self) -> List[str]:
-        """Return bare urls from the the stripped wikitext (templates are stripped away)"""
-        if isinstance(self.wikicode, Wikicode):
-            stripped_wikicode = str(self.wikicode.strip_code())
-            logger.debug(stripped_wikicode)
-            return re.findall(
-                regex_url_link_extraction,
-                stripped_wikicode,
-            )
-        else:
-            return []
-
     # TODO this does not work, no comments are ever found, see tests
     # def __find_bare_urls_in_comments__(self) -> List[str]:
     #     """Return non-unique bare urls from the the stripped wikitext (templates are stripped away)"""
@@ -346,19 +348,8 @@ class WikipediaReferenceV2(JobBaseModel):
             self.is_named_reused_reference = True
         else:
             logger.debug(f"Extracting templates from: {self.wikicode}")
-            if isinstance(self.wikicode, Tag):
-                # contents is needed here to get a Wikicode object
-                raw_templates = self.wikicode.contents.ifilter_templates(
-                    matches=lambda x: not x.name.lstrip().startswith("#"),
-                    recursive=True,
-                )
-            else:
-                raw_templates = self.wikicode.ifilter_templates(
-                    matches=lambda x: not x.name.lstrip().startswith("#"),
-                    recursive=True,
-                )
             count = 0
-            for raw_template in raw_templates:
+            for raw_template in self.__find_raw_templates__():
                 count += 1
                 self.templates.append(
                     WikipediaTemplateV2(
@@ -368,6 +359,49 @@ class WikipediaReferenceV2(JobBaseModel):
             if count == 0:
                 logger.debug("Found no templates")
 
+    def __find_raw_templates__(self) -> Iterator[Template]:
+        """Iterate the templates in self.wikicode except parser functions"""
+        if isinstance(self.wikicode, Tag):
+            # contents is needed here to get a Wikicode object
+            wikicode = self.wikicode.contents
+        else:
+            wikicode = self.wikicode
+        return wikicode.ifilter_templates(
+            matches=lambda x: not x.name.lstrip().startswith("#"),
+            recursive=True,
+        )
+
+    def detach_wikicode(self) -> None:
+        """Drop the parse trees of an extracted reference
+
+        Unpickling the trees costs more than extracting the reference,
+        so references coming back from the process pool leave them behind.
+        See attach_wikicode()"""
+        self.wikicode = None  # type: ignore
+        for template in self.templates or []:
+            template.raw_template = None
+
+    def attach_wikicode(self, wikicode: Union[Tag, Wikicode]) -> bool:
+        """Give a detached reference the parse trees of the wikicode it was extracted from
+
+        Return False if the templates in wikicode do not match the extracted ones"""
+        self.wikicode = wikicode
+        return self.__attach_raw_templates__(templates=self.templates)
+
+    def __attach_raw_templates__(
+        self, templates: Optional[List[WikipediaTemplateV2]]
+    ) -> bool:
+        """Give templates extracted without parse trees the templates in self.wikicode
+
+        Return False if they do not match"""
+        if templates:
+            raw_templates = list(self.__find_raw_templates__())
+            if len(raw_templates) != len(templates):
+                return False
+            for template, raw_template in zip(templates, raw_templates):
+                template.raw_template = raw_template
+        return True
+
     def __extract_and_clean_template_parameters__(self) -> None:
         """We extract all templates"""
         from src import app
@@ -384,20 +418,145 @@ class WikipediaReferenceV2(JobBaseModel):
         from src import app
 
         app.logger.debug("==> extract_and_check")
-        self.__parse_xhtml__()
-        self.__extract_xhtml_comments__()
-        self.__extract_templates_and_parameters__()
-        self.__extract_reference_urls__()
-        self.__extract_unique_first_level_domains__()
+        self.wikitext_hash = hashlib.md5(f"{self.wikicode}".encode()).hexdigest()
+        self.__extract_comments__()
+        if not self.__load_from_cache__():
+            self.__extract_templates_and_parameters__()
+            self.__extract_reference_urls__()
+            self.__extract_unique_first_level_domains__()
+            self.__save_to_cache__()
         self.__generate_reference_id__()
 
     def __generate_reference_id__(self) -> None:
         """This generates an 8-char long id based on the md5 hash of
         the raw wikitext for this reference"""
-        self.reference_id = hashlib.md5(f"{self.wikicode}".encode()).hexdigest()[:8]
+        if not self.wikitext_hash:
+            self.wikitext_hash = hashlib.md5(f"{self.wikicode}".encode()).hexdigest()
+        self.reference_id = self.wikitext_hash[:8]
+
+    @property
+    def cache_key(self) -> Tuple[str, str]:
+        """The md5 of the wikitext and everything else the extraction depends on"""
+        return (
+            self.wikitext_hash,
+            f"{EXTRACTOR_VERSION}:{self.language_code}:"
+            f"{type(self.wikicode).__name__}:{int(self.is_general_reference)}",
+        )
+
+    def __get_cached_fields__(self) -> Dict[str, Any]:
+        """The extracted fields with copies of the templates without parse trees"""
+        fields = {name: getattr(self, name) for name in cached_fields}
+        if self.templates:
+            fields["templates"] = [copy(template) for template in self.templates]
+            for template in fields["templates"]:
+                template.raw_template = None
+        return fields
+
+    def __set_cached_fields__(self, fields: Dict[str, Any]) -> bool:
+        """Set the extracted fields and give the templates the parse trees from self.wikicode
 
-    def __extract_xhtml_comments__(self):
-        if not self.soup:
-            raise MissingInformationError()
-        # Find all comment tags in the HTML
-        return self.soup.find_all(text=lambda text: isinstance(text, Comment))
+        Return False if the templates do not match self.wikicode"""
+        if not self.__attach_raw_templates__(templates=fields["templates"]):
+            logger.warning(f"the cached reference {self.wikitext_hash} did not match")
+            return False
+        for name, value in fields.items():
+            setattr(self, name, value)
+        return True
+
+    def __load_from_cache__(self) -> bool:
+        """Set the extracted fields from the reference cache
+
+        Return False if the reference was not in the cache"""
+        if not reference_cache.enabled():
+            return False
+        payload = reference_cache.get(self.cache_key)
+        if payload is None:
+            return False
+        try:
+            fields = self.__decode_cached_fields__(payload=payload)
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"could not load the cached reference {self.wikitext_hash}")
+            return False
+        return self.__set_cached_fields__(fields=fields)
+
+    def __save_to_cache__(self) -> None:
+        """Store the extracted fields in the reference cache, without parse trees"""
+        if not reference_cache.enabled():
+            return
+        reference_cache.put(
+            self.cache_key,
+            self.__encode_cached_fields__(fields=self.__get_cached_fields__()),
+        )
+
+    @staticmethod
+    def __encode_cached_fields__(fields: Dict[str, Any]) -> bytes:
+        """The cached fields as json
+
+        The cache file is shared so we store plain data and not objects.
+        The urls are stored once in "urls" and the fields refer to them by their raw url."""
+        urls: Dict[str, Dict[str, Any]] = {}
+
+        def raw_urls(
+            wikipedia_urls: Optional[List[WikipediaUrlV2]],
+        ) -> Optional[List[str]]:
+            if wikipedia_urls is None:
+                return None
+            for url in wikipedia_urls:
+                urls[url.url] = url.get_dict
+            return [url.url for url in wikipedia_urls]
+
+        payload: Dict[str, Any] = dict(fields)
+        for name in url_fields:
+            payload[name] = raw_urls(fields[name])
+        if fields["templates"] is not None:
+            payload["templates"] = [
+                dict(
+                    template.get_fields(),
+                    raw_template=None,
+                    extracted_urls=raw_urls(template.extracted_urls),
+                )
+                for template in fields["templates"]
+            ]
+        if fields["url_origins"] is not None:
+            payload["url_origins"] = {
+                raw_url: [origin.value for origin in origins]
+                for raw_url, origins in fields["url_origins"].items()
+            }
+        payload["urls"] = urls
+        return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+    @staticmethod
+    def __decode_cached_fields__(payload: bytes) -> Dict[str, Any]:
+        """The cached fields of json from __encode_cached_fields__"""
+        data = json.loads(payload)
+        urls = {
+            raw_url: WikipediaUrlV2.from_dict(url)
+            for raw_url, url in data.pop("urls").items()
+        }
+        fields = {name: data[name] for name in cached_fields}
+        for name in url_fields:
+            if fields[name] is not None:
+                fields[name] = [urls[raw_url] for raw_url in fields[name]]
+        if fields["templates"] is not None:
+            fields["templates"] = [
+                WikipediaTemplateV2(
+                    **dict(
+                        template,
+                        parameters=OrderedDict(template["parameters"]),
+                        extracted_urls=[
+                            urls[raw_url] for raw_url in template["extracted_urls"]
+                        ],
+                    )
+                )
+                for template in fields["templates"]
+            ]
+        if fields["url_origins"] is not None:
+            fields["url_origins"] = {
+                raw_url: [UrlOrigin(origin) for origin in origins]
+                for raw_url, origins in fields["url_origins"].items()
+            }
+        return fields
+
+    def __extract_comments__(self):
+        """Extract the html comments straight from the wikicode"""
+        self.comments = extract_comments(self.wikicode)
@@ -1,17 +1,25 @@
 import logging
+from concurrent.futures.process import BrokenProcessPool
 from copy import deepcopy
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 import mwparserfromhell  # type: ignore
 from bs4 import BeautifulSoup
+from mwparserfromhell.nodes import Text  # type: ignore
+from mwparserfromhell.smart_list import SmartList  # type: ignore
 from mwparserfromhell.wikicode import Wikicode  # type: ignore
 from iarilib.parse_utils import extract_cite_refs
 
+from src.helpers import process_pool, reference_cache
 from src.models.base import WariBaseModel  # TODO change to IariBaseModel
 from src.models.exceptions import MissingInformationError
 from src.models.v2.job.article_job_v2 import ArticleJobV2
 from src.models.v2.wikimedia.wikipedia.reference import WikipediaReferenceV2
-from src.models.v2.wikimedia.wikipedia.section_v2 import WikipediaSectionV2
+from src.models.v2.wikimedia.wikipedia.section_index_v2 import WikipediaSectionIndexV2
+from src.models.v2.wikimedia.wikipedia.section_v2 import (
+    WikipediaSectionV2,
+    extract_reference_batch,
+)
 from src.models.v2.wikimedia.wikipedia.url_v2 import WikipediaUrlV2
 
 # logging.basicConfig(level=config.loglevel)
@@ -31,10 +39,12 @@ class WikipediaReferenceExtractorV2(WariBaseModel):
 
     job: ArticleJobV2
     sections: Optional[List[WikipediaSectionV2]] = None
+    section_index: Optional[WikipediaSectionIndexV2] = None
 
     wikitext: str
     wikicode: Wikicode = None  # wiki object tree parsed from wikitext
     html_source: Optional[str] = ""  # used to extract citeref reference data
+    html_soup: Optional[Any] = None  # html_source already parsed by the article, if any
 
     references: Optional[List[WikipediaReferenceV2]] = None
     # cite_page_refs: Optional[List] = []
@@ -215,49 +225,115 @@ class WikipediaReferenceExtractorV2(WariBaseModel):
 
         self.sections = []
         app.logger.debug("__extract_sections__: running")
-        if not self.wikicode:
+        if self.wikicode is None:
             self.__parse_wikitext__()
-        sections: List[Wikicode] = self.wikicode.get_sections(
-            levels=[2],
-            include_headings=True,
-        )
+        if self.section_index is None:
+            self.__index_sections__()
 
         # TODO: make this code better by special casing no section and making faux section, and putting through same loop
 
-        if not sections:
+        if not self.section_index.number_of_sections:
             app.logger.debug("No level 2 sections detected, creating root section")
             # console.print(self.wikicode)
             # exit()
-            mw_section = WikipediaSectionV2(
-                # We add the whole article to the root section
-                wikicode=self.wikicode,
-                testing=self.testing,
-                language_code=self.language_code,
-                job=self.job,
-            )
-            mw_section.extract()
-            self.sections.append(mw_section)
-
-        else:
-            self.__extract_root_section__()
-            for section in sections:
-                mw_section = WikipediaSectionV2(
-                    wikicode=section,
+            sections = [
+                WikipediaSectionV2(
+                    # We add the whole article to the root section
+                    wikicode=self.wikicode,
                     testing=self.testing,
                     language_code=self.language_code,
                     job=self.job,
                 )
+            ]
+
+        else:
+            root_section = self.__build_root_section__()
+            sections = [root_section] if root_section is not None else []
+            for number, name in enumerate(self.section_index.names):
+                sections.append(
+                    WikipediaSectionV2(
+                        wikicode=self.section_index.section_wikicode(
+                            wikicode=self.wikicode, number=number
+                        ),
+                        heading_name=name,
+                        testing=self.testing,
+                        language_code=self.language_code,
+                        job=self.job,
+                    )
+                )
+        if process_pool.enabled(size=len(self.wikitext)):
+            self.__extract_sections_in_parallel__(sections=sections)
+        else:
+            for mw_section in sections:
                 mw_section.extract()
-                self.sections.append(mw_section)
+        reference_cache.flush()
+        self.sections = sections
         app.logger.debug(f"Number of sections found: {len(self.sections)}")
 
+    def __extract_sections_in_parallel__(
+        self, sections: List[WikipediaSectionV2]
+    ) -> None:
+        """Extract the references of all sections in the process pool
+
+        The parsed trees are too expensive to send to other processes,
+        so every worker gets the wikitext of a batch of references and parses it again.
+        The references come back in document order without their trees, they get
+        the nodes of our tree back and are assigned to their section
+        like WikipediaSectionV2.extract() would have added them."""
+        from src import app
+
+        found = [section.find_references() for section in sections]
+        batch = [
+            (
+                str(wikicode),
+                is_general_reference,
+                section.name,
+                self.language_code,
+                self.testing,
+            )
+            for section, references in zip(sections, found)
+            for wikicode, is_general_reference in references
+        ]
+        app.logger.info(
+            f"extracting {len(batch)} references from {len(sections)} sections in parallel"
+        )
+        try:
+            extracted = iter(
+                process_pool.map_in_batches(extract_reference_batch, batch)
+            )
+        except BrokenProcessPool:
+            app.logger.exception("the process pool broke, extracting serially instead")
+            process_pool.shutdown()
+            for section in sections:
+                section.extract()
+            return
+        for section, references in zip(sections, found):
+            for wikicode, is_general_reference in references:
+                reference = next(extracted)
+                if reference is None or not reference.attach_wikicode(wikicode):
+                    # The worker could not rebuild this reference from its wikitext
+                    reference = WikipediaReferenceV2(
+                        wikicode=wikicode,
+                        testing=self.testing,
+                        language_code=self.language_code,
+                        is_general_reference=is_general_reference,
+                        section=section.name,
+                    )
+                    reference.extract_and_check()
+                section.references.append(reference)
+
     def __parse_wikitext__(self):
         from src import app
 
         app.logger.debug("__parse_wikitext__: running")
-        if not self.wikicode:
+        if self.wikicode is None:
             self.wikicode = mwparserfromhell.parse(self.wikitext)
 
+    def __index_sections__(self):
+        """Index the lines and level 2 sections once for the whole article"""
+        self.section_index = WikipediaSectionIndexV2(wikitext=self.wikitext)
+        self.section_index.build(wikicode=self.wikicode)
+
     def __parse_html_source__(self):
         """
         Parses html to extract cite reference data from references section
@@ -269,8 +345,13 @@ class WikipediaReferenceExtractorV2(WariBaseModel):
         # def is_citeref_link(css_class):
         #     return css_class is None  # and len(css_class) == 6
 
-        if self.html_source:
-            self.cite_page_refs = extract_cite_refs(self.html_source)
+        if self.html_soup or self.html_source:
+            self.cite_page_refs = extract_cite_refs(
+                self.html_source,
+                soup=self.html_soup,
+                pretty_html=self.job.pretty_html,
+                omit_html=self.job.omit_html,
+            )
 
     @property
     def reference_ids(self) -> List[str]:
@@ -290,42 +371,62 @@ class WikipediaReferenceExtractorV2(WariBaseModel):
 
     def __extract_root_section__(self):
         """This extracts the root section from the beginning until the first level 2 heading"""
+        self.sections = []
+        mw_section = self.__build_root_section__()
+        if mw_section is not None:
+            mw_section.extract()
+            self.sections.append(mw_section)
+
+    def __build_root_section__(self) -> Optional[WikipediaSectionV2]:
+        """The root section from the beginning until the first level 2 heading, not yet extracted"""
         if not self.wikitext:
             raise MissingInformationError()
-        self.sections = []
-        first_level2_heading_line_number = 0
-        for index, line in enumerate(self.wikitext.splitlines()):
-            if "==" in line:
-                logger.debug(f"found == in line: {line}, with index {index}")
-                first_level2_heading_line_number = index
-                # We break at first hit
-                break
-        if first_level2_heading_line_number:
-            root_section_wikitext = self.extract_lines(
-                end=first_level2_heading_line_number
-            )
-            # console.print(root_section_wikitext)
-            # exit()
-            mw_section = WikipediaSectionV2(
-                wikitext=root_section_wikitext,
+        if self.section_index is None:
+            self.__index_sections__()
+        root_section_end = self.section_index.root_end
+        if root_section_end:
+            logger.debug(f"found == in the line starting at offset {root_section_end}")
+            return WikipediaSectionV2(
+                wikicode=self.__slice_wikicode__(end=root_section_end),
+                heading_name="root",
                 testing=self.testing,
                 language_code=self.language_code,
                 job=self.job,
             )
-            mw_section.extract()
-            self.sections.append(mw_section)
-        else:
-            logger.debug(
-                "Special case, wikitext started with a "
-                "level 2 heading so we don't do anything"
-            )
+        logger.debug(
+            "Special case, wikitext started with a "
+            "level 2 heading so we don't do anything"
+        )
+        return None
+
+    def __slice_wikicode__(self, end: int) -> Wikicode:
+        """Return the part of self.wikicode that makes up self.wikitext[:end]
+
+        The nodes are taken from the tree we already parsed. Only if end
+        falls inside a node other than text do we parse the wikitext again."""
+        if end >= len(self.wikitext):
+            return Wikicode(SmartList(self.wikicode.nodes))
+        number = self.section_index.node_number(end)
+        if number < 0:
+            return Wikicode(SmartList())
+        nodes = SmartList(self.wikicode.nodes[:number])
+        start = self.section_index.node_offsets[number]
+        if start < end:
+            node = self.wikicode.nodes[number]
+            if not isinstance(node, Text):
+                logger.debug("the slice ends inside a node, parsing it again")
+                return mwparserfromhell.parse(self.wikitext[:end])
+            nodes.append(Text(node.value[: end - start]))
+        return Wikicode(nodes)
 
     def extract_lines(self, end) -> str:
         """Extract lines until end"""
-        lines = ""
         if not end:
             raise MissingInformationError("did not get what we need")
-        for index, line in enumerate(str(self.wikicode).splitlines()):
-            if index < end:
-                lines += f"{line}\n"
-        return lines
+        if self.section_index is None:
+            self.__index_sections__()
+        if end < self.section_index.number_of_lines:
+            return self.wikitext[: self.section_index.line_offsets[end]]
+        if self.wikitext.endswith("\n"):
+            return self.wikitext
+        return f"{self.wikitext}\n"
@@ -3,13 +3,12 @@ import logging
 import re
 from typing import Any, Dict, List, Optional, Union
 
-from bs4 import BeautifulSoup, Comment
 from mwparserfromhell.nodes import Tag  # type: ignore
 from mwparserfromhell.wikicode import Wikicode  # type: ignore
 
 from config import regex_url_link_extraction
+from iarilib.parse_utils import extract_ref_name
 from src.models.base.job import JobBaseModel
-from src.models.exceptions import MissingInformationError
 from src.models.v2.wikimedia.wikipedia.reference.template import WikipediaTemplateV2
 from src.models.v2.wikimedia.wikipedia.url_v2 import WikipediaUrlV2
 from src.models.wikimedia.wikipedia.reference.enums import (
@@ -45,34 +44,12 @@ class WikipediaReferenceLiteV2(JobBaseModel):
 
     @property
     def get_name(self) -> str:
-        if not self.soup:
-            raise MissingInformationError()
-        # Find the <ref> tag
-        ref_tag = self.soup.find("ref")
-        if ref_tag:
-            # Extract the value of the 'name' attribute
-            name = str(ref_tag.get("name"))  # type: ignore # see https://github.com/python/typeshed/issues/8356
-            if name.endswith("\\"):
-                # Cut off the trailing backward slash
-                name = name[:-1]
-            if name.endswith("/"):
-                # Cut off the trailing forward slash
-                name = name[:-1]
-            if name == "None" or name is None:
-                return ""
-            else:
-                return name
-        else:
-            return ""
-
+        return extract_ref_name(self.wikicode)
 
     @property
     def wikicode_as_string(self):
         return str(self.wikicode)
 
-    def __parse_xhtml__(self):
-        self.soup = BeautifulSoup(str(self.wikicode), "lxml")
-
     def __extract_template_urls__(self) -> None:
         self.template_urls = []
         urls = []
@@ -84,13 +61,9 @@ class WikipediaReferenceLiteV2(JobBaseModel):
 
     def __extract_bare_urls_outside_templates__(self) -> None:
         """This is a slightly more sophisticated and slower search for bare URLs using a regex"""
-        self.bare_urls = []
-        urls = []
-        for url in self.__find_bare_urls_outside_templates__():
-            url_object = WikipediaUrlV2(url=url)
-            url_object.extract()
-            urls.append(url_object)
-        self.bare_urls = urls
+        self.bare_urls = WikipediaUrlV2.extract_many(
+            self.__find_bare_urls_outside_templates__()
+        )
 
     # def __extract_external_wikicoded_links_from_the_reference__(self) -> None:
     #     """
@@ -247,8 +220,7 @@ class WikipediaReferenceLiteV2(JobBaseModel):
         from src import app
 
         app.logger.debug("extract_and_check: running")
-        self.__parse_xhtml__()
-        # self.__extract_xhtml_comments__()
+        # self.__extract_comments__()
         # self.__extract_templates_and_parameters__()
         # self.__extract_reference_urls__()
         # self.__extract_unique_first_level_domains__()
@@ -259,8 +231,7 @@ class WikipediaReferenceLiteV2(JobBaseModel):
     #     from src import app
     #
     #     app.logger.debug("extract_and_check: running")
-    #     self.__parse_xhtml__()
-    #     self.__extract_xhtml_comments__()
+    #     self.__extract_comments__()
     #     self.__extract_templates_and_parameters__()
     #     self.__extract_reference_urls__()
     #     self.__extract_unique_first_level_domains__()
@@ -1,28 +1,54 @@
 import logging
-import re
 from collections import OrderedDict
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from mwparserfromhell.nodes import Template  # type: ignore
-from pydantic import BaseModel, validate_arguments
 
+from iarilib.parse_utils import remove_html_comments
 from src.models.exceptions import MissingInformationError
+from src.models.v2.base import IariRecord
 from src.models.v2.wikimedia.wikipedia.url_v2 import WikipediaUrlV2
 
 logger = logging.getLogger(__name__)
 
-
-class WikipediaTemplateV2(BaseModel):
-
-    parameters: OrderedDict = OrderedDict()
-    raw_template: Template  # Union[Template, str]  # We allow union here to enable easier testing
-    extraction_done: bool = False
-    missing_or_empty_first_parameter: bool = False
-    # language_code: str = ""  # Used only to generate the URI for the template
-    isbn: str = ""
-
-    class Config:  # dead: disable
-        arbitrary_types_allowed = True  # dead: disable
+# Names of the template parameters that hold a url, per language code.
+# The names are the ones left after __fix_key_names_in_template_parameters__
+# and "" is used for every language without an entry of its own.
+url_parameter_names: Dict[str, Tuple[str, ...]] = {
+    "": ("url", "archive_url", "conference_url", "transcript_url", "chapter_url"),
+}
+
+
+class WikipediaTemplateV2(IariRecord):
+    """A template in a reference, a light record because there are thousands per article"""
+
+    __slots__ = (
+        "parameters",
+        "raw_template",
+        "extraction_done",
+        "missing_or_empty_first_parameter",
+        "language_code",
+        "isbn",
+        "extracted_urls",
+    )
+
+    def __init__(
+        self,
+        raw_template: Template,  # None when detached from the parse tree
+        language_code: str = "",  # Used to look up the url parameter names
+        parameters: Optional[OrderedDict] = None,
+        extraction_done: bool = False,
+        missing_or_empty_first_parameter: bool = False,
+        isbn: str = "",
+        extracted_urls: Optional[List[WikipediaUrlV2]] = None,
+    ):
+        self.parameters = OrderedDict() if parameters is None else parameters
+        self.raw_template = raw_template
+        self.extraction_done = extraction_done
+        self.missing_or_empty_first_parameter = missing_or_empty_first_parameter
+        self.language_code = language_code
+        self.isbn = isbn
+        self.extracted_urls = [] if extracted_urls is None else extracted_urls
 
     @property
     def wikitext(self) -> str:
@@ -50,47 +76,16 @@ class WikipediaTemplateV2(BaseModel):
 
     @property
     def urls(self) -> List[WikipediaUrlV2]:
-        """This returns a list"""
-        # if not self.extracted:
-        #     raise MissingInformationError("this template has not been extracted")
-        urls = set()
-
-        if "url" in self.parameters:
-            url = self.parameters["url"]
-            if url:
-                logger.debug(f"url: {url}")
-                url = WikipediaUrlV2(url=url)
-                url.extract()
-                urls.add(url)
-
-        if "archive_url" in self.parameters:
-            url = self.parameters["archive_url"]
-            if url:
-                url = WikipediaUrlV2(url=url)
-                url.extract()
-                urls.add(url)
-
-        if "conference_url" in self.parameters:
-            url = self.parameters["conference_url"]
-            if url:
-                url = WikipediaUrlV2(url=url)
-                url.extract()
-                urls.add(url)
-
-        if "transcript_url" in self.parameters:
-            url = self.parameters["transcript_url"]
-            if url:
-                url = WikipediaUrlV2(url=url)
-                url.extract()
-                urls.add(url)
-
-        if "chapter_url" in self.parameters:
-            url = self.parameters["chapter_url"]
-            if url:
-                url = WikipediaUrlV2(url=url)
-                url.extract()
-                urls.add(url)
-        return list(urls)
+        """The urls in the url parameters, extracted once in extract_and_prepare_parameter_and_flds"""
+        if not self.extraction_done:
+            self.__extract_urls__()
+        return self.extracted_urls
+
+    def __extract_urls__(self) -> None:
+        names = url_parameter_names.get(self.language_code, url_parameter_names[""])
+        raw_urls = [self.parameters[name] for name in names if self.parameters.get(name)]
+        logger.debug(f"urls: {raw_urls}")
+        self.extracted_urls = list(set(WikipediaUrlV2.extract_many(raw_urls)))
 
     @property
     def name(self):
@@ -106,24 +101,8 @@ class WikipediaTemplateV2(BaseModel):
 
     @staticmethod
     def __remove_comments__(text: str):
-        """Remove html comments <!-- -->
-        Copyright pywikibot authors"""
-        # This regex tries to match text on both sides of
-        # the comment and join them or in the case no comment is found
-        # just return the whole thing.
-        regex = re.compile(r"(.*)<!--.*-->(.*)|(.*)")
-        matches = re.findall(pattern=regex, string=text)
-        if matches:
-            # print(match.groups())
-            string = ""
-            for match in matches:
-                # print(match)
-                if match:
-                    for part in match:
-                        string += str(part)
-            return string.strip()
-        else:
-            return text
+        """Remove html comments <!-- --> and surrounding whitespace"""
+        return remove_html_comments(text).strip()
 
     # noinspection PyShadowingNames
     @staticmethod
@@ -204,6 +183,7 @@ class WikipediaTemplateV2(BaseModel):
         self.__add_template_name_to_parameters__()
         self.__rename_one_to_first_parameter__()
         self.__extract_isbn__()
+        self.__extract_urls__()
         self.extraction_done = True
         # self.__extract_first_level_domains_from_urls__()
 
@@ -264,7 +244,6 @@ class WikipediaTemplateV2(BaseModel):
                 myDict[key] = self.parameters[key]
         self.parameters = myDict
 
-    @validate_arguments
     def __fix_key_names_in_template_parameters__(self):
         """This avoids parse errors"""
         self.__fix_class_key__()
@@ -0,0 +1,123 @@
+import logging
+from array import array
+from bisect import bisect_right
+from typing import List
+
+from mwparserfromhell.nodes import Heading, Text  # type: ignore
+from mwparserfromhell.wikicode import Wikicode  # type: ignore
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class WikipediaSectionIndexV2(BaseModel):
+    """Index of the lines and level 2 sections of an article
+
+    It is built once per article from the top level nodes of the parsed wikitext.
+    The sections are the same as Wikicode.get_sections(levels=[2]) returns.
+
+    Offsets are character offsets into wikitext and lines are split on \\n.
+    The names are the heading lines with = removed like WikipediaSectionV2.name"""
+
+    wikitext: str
+    line_offsets: array = array("l")  # where each line starts
+    node_offsets: array = array("l")  # where each top level node starts
+    section_first_nodes: array = array("l")  # top level node index of each heading
+    section_end_nodes: array = array("l")  # top level node index where each section ends
+    heading_offsets: array = array("l")
+    section_end_offsets: array = array("l")
+    section_first_lines: array = array("l")  # line of the heading
+    section_end_lines: array = array("l")  # first line after the section
+    names: List[str] = []
+    root_end: int = 0  # offset where the root section ends, 0 means no root section
+
+    class Config:  # dead: disable
+        arbitrary_types_allowed = True  # dead: disable
+
+    @property
+    def number_of_sections(self) -> int:
+        return len(self.section_first_nodes)
+
+    @property
+    def number_of_lines(self) -> int:
+        return len(self.line_offsets)
+
+    def build(self, wikicode: Wikicode) -> None:
+        """Build the index in a single pass over the wikitext and the top level nodes"""
+        self.__index_lines__()
+        self.__index_sections__(wikicode=wikicode)
+        self.__index_root_section__()
+
+    def line_number(self, offset: int) -> int:
+        """The number of the line the offset is on"""
+        return bisect_right(self.line_offsets, offset) - 1
+
+    def node_number(self, offset: int) -> int:
+        """The number of the top level node the offset is in"""
+        return bisect_right(self.node_offsets, offset) - 1
+
+    def section_wikicode(self, wikicode: Wikicode, number: int) -> Wikicode:
+        """Slice the nodes of section number out of the wikicode the index was built from"""
+        return Wikicode(
+            wikicode.nodes[
+                self.section_first_nodes[number] : self.section_end_nodes[number]
+            ]
+        )
+
+    def __index_lines__(self) -> None:
+        self.line_offsets = array("l", [0])
+        find = self.wikitext.find
+        offset = find("\n")
+        while offset != -1:
+            self.line_offsets.append(offset + 1)
+            offset = find("\n", offset + 1)
+
+    def __index_sections__(self, wikicode: Wikicode) -> None:
+        self.section_first_nodes = array("l")
+        self.section_end_nodes = array("l")
+        self.heading_offsets = array("l")
+        self.section_end_offsets = array("l")
+        self.node_offsets = array("l")
+        self.names = []
+        offset = 0
+        open_section = False
+        for index, node in enumerate(wikicode.nodes):
+            self.node_offsets.append(offset)
+            # Like in get_sections a level 2 section is closed by the next heading of level 1 or 2
+            if isinstance(node, Heading) and node.level <= 2:
+                if open_section:
+                    self.section_end_nodes.append(index)
+                    self.section_end_offsets.append(offset)
+                    open_section = False
+                if node.level == 2:
+                    self.section_first_nodes.append(index)
+                    self.heading_offsets.append(offset)
+                    open_section = True
+            if isinstance(node, Text):
+                offset += len(node.value)
+            else:
+                offset += len(str(node))
+        if open_section:
+            self.section_end_nodes.append(len(wikicode.nodes))
+            self.section_end_offsets.append(offset)
+        self.section_first_lines = array("l", map(self.line_number, self.heading_offsets))
+        self.section_end_lines = array(
+            "l",
+            (
+                self.line_number(end) if end < len(self.wikitext) else self.number_of_lines
+                for end in self.section_end_offsets
+            ),
+        )
+        for offset in self.heading_offsets:
+            line_end = self.wikitext.find("\n", offset)
+            line = self.wikitext[offset : line_end if line_end != -1 else None]
+            self.names.append(line.replace("=", ""))
+        logger.debug(f"indexed {self.number_of_sections} level 2 sections")
+
+    def __index_root_section__(self) -> None:
+        """The root section ends at the first line with == in it"""
+        first_heading = self.wikitext.find("==")
+        if first_heading > 0:
+            self.root_end = self.line_offsets[self.line_number(first_heading)]
+        else:
+            self.root_end = 0
@@ -1,30 +1,50 @@
 import logging
 import re
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple, Union
 
 import mwparserfromhell  # type: ignore
+from mwparserfromhell.nodes import Node, Tag, Text  # type: ignore
+from mwparserfromhell.smart_list import SmartList  # type: ignore
 from mwparserfromhell.wikicode import Wikicode  # type: ignore
-from pydantic import BaseModel
 
+from src.helpers import reference_cache
 from src.models.exceptions import MissingInformationError
+from src.models.v2.base import IariRecord
 from src.models.v2.job.article_job_v2 import ArticleJobV2
 from src.models.v2.wikimedia.wikipedia.reference import WikipediaReferenceV2
 
 logger = logging.getLogger(__name__)
 
 
-class WikipediaSectionV2(BaseModel):
+class WikipediaSectionV2(IariRecord):
     """This accepts both wikicode directly from mwparserfromhell and wikitext"""
 
-    testing: bool = False
-    language_code: str = ""
-    wikicode: Optional[Wikicode] = None
-    wikitext: str = ""
-    references: List[WikipediaReferenceV2] = []
-    job: ArticleJobV2
-
-    class Config:  # dead: disable
-        arbitrary_types_allowed = True  # dead: disable
+    __slots__ = (
+        "testing",
+        "language_code",
+        "wikicode",
+        "wikitext",
+        "heading_name",
+        "references",
+        "job",
+    )
+
+    def __init__(
+        self,
+        job: ArticleJobV2,
+        testing: bool = False,
+        language_code: str = "",
+        wikicode: Optional[Wikicode] = None,
+        wikitext: str = "",
+        heading_name: Optional[str] = None,  # memoized name, set by the extractor from the section index
+    ):
+        self.testing = testing
+        self.language_code = language_code
+        self.wikicode = wikicode
+        self.wikitext = wikitext
+        self.heading_name = heading_name
+        self.references: List[WikipediaReferenceV2] = []
+        self.job = job
 
     @property
     def is_general_reference_section(self):
@@ -38,16 +58,24 @@ class WikipediaSectionV2(BaseModel):
             self.__populate_wikitext__()
         return self.wikitext.split("\n")
 
+    @property
+    def __first_line__(self) -> str:
+        if self.wikicode is not None:
+            return next(self.__iterate_lines__())[0]
+        return self.__get_lines__[0]
+
     @property
     def name(self) -> str:
         """Extracts a section name from the first line of the output from mwparserfromhell"""
-        line = self.__get_lines__[0]
-        # Handle special case where no level 2 heading is at the beginning of the section
-        if "==" not in line:
-            logger.info(f"== not found in line {line}")
-            return "root"
-        else:
-            return str(self.__extract_name_from_line__(line=line))
+        if self.heading_name is None:
+            line = self.__first_line__
+            # Handle special case where no level 2 heading is at the beginning of the section
+            if "==" not in line:
+                logger.info(f"== not found in line {line}")
+                self.heading_name = "root"
+            else:
+                self.heading_name = str(self.__extract_name_from_line__(line=line))
+        return self.heading_name
 
     @property
     def number_of_references(self):
@@ -65,10 +93,11 @@ class WikipediaSectionV2(BaseModel):
         app.logger.debug("extract_name_from_line: running")
         return line.replace("=", "")
 
-    def __extract_all_general_references__(self):
+    def __find_general_references__(self) -> List[Wikicode]:
+        """Return the wikicode of every line in the section that starts with a star"""
         from src import app
 
-        app.logger.debug("==> WikipediaSectionV2::__extract_all_general_references__")
+        app.logger.debug("==> WikipediaSectionV2::__find_general_references__")
 
         # bail if this section is not a "general reference" section
         # i'm not sure we need to filter this here, as we want to do all sections, i believe
@@ -78,89 +107,155 @@ class WikipediaSectionV2(BaseModel):
 
         app.logger.info(f"processing section {self.name}")
 
+        general_references = []
+        lines = self.__iterate_lines__()
         # Discard the header line
-        lines = self.wikitext.split("\n")
-        lines_without_heading = lines[1:]
-        logger.debug(
-            f"Extracting {len(lines_without_heading)} lines form section {lines[0]}"
-        )
-        for line in lines_without_heading:
+        heading, _ = next(lines)
+        logger.debug(f"Extracting lines form section {heading}")
+        for line, nodes in lines:
             # Guard against empty line
 
             # logger.info(f"Working on line: {line}")
             # Discard all lines not starting with a star to avoid categories and other templates
             # not containing any references
             if line and self.star_found_at_line_start(line=line):
-                parsed_line = mwparserfromhell.parse(line)
+                if nodes is None:
+                    # The line is only a fragment of a node spanning more lines
+                    # so we parse it on its own like we always did
+                    parsed_line = mwparserfromhell.parse(line)
+                else:
+                    parsed_line = Wikicode(SmartList(nodes))
                 logger.debug("Appending line with star to references")
                 # We don't know what the line contains besides a start
                 # but we assume it is a reference
-                reference = WikipediaReferenceV2(
-                    wikicode=parsed_line,
-                    testing=self.testing,
-                    language_code=self.language_code,
-                    is_general_reference=True,
-                    section=self.name,
-                )
-                reference.extract_and_check()
-                self.references.append(reference)
-
-    def __extract_all_footnote_references__(self):
-        """This extracts all <ref>...</ref> from self.wikicode"""
+                general_references.append(parsed_line)
+        return general_references
+
+    def __find_footnote_references__(self) -> List[Tag]:
+        """This finds all <ref>...</ref> in self.wikicode"""
         from src import app
 
-        app.logger.debug("==> __extract_all_footnote_references__")
+        app.logger.debug("==> __find_footnote_references__")
         # Thanks to https://github.com/JJMC89,
         # see https://github.com/earwig/mwparserfromhell/discussions/295#discussioncomment-4392452
 
-        if not self.wikicode:
+        if self.wikicode is None or not self.wikicode.nodes:
             raise MissingInformationError(
                 f"The section {self} did not have any wikicode"
             )
         refs = self.wikicode.filter_tags(matches=lambda tag: tag.tag.lower() == "ref")
-
         app.logger.debug(f"Number of footnote refs found: {len(refs)}")
-        base_ref_counter = 0
-        for ref in refs:
+        return refs
 
-            # only increment base_ref_counter if not a "named" or "reference ref"
-            base_ref_counter += 1
-
-            # app.logger.debug(f"### ### ###")
-            app.logger.debug(f"extracting ref# {base_ref_counter}")
-            # app.logger.debug(f"### ### ###")
+    def find_references(self) -> List[Tuple[Union[Tag, Wikicode], bool]]:
+        """Return the wikicode of all references in the order extract() adds them
+        together with whether it is a general reference"""
+        if (self.wikicode is None or not self.wikicode.nodes) and not self.wikitext:
+            raise MissingInformationError(
+                "We need either wikicode or wikitext to continue"
+            )
+        self.__parse_wikitext__()
+        return [(line, True) for line in self.__find_general_references__()] + [
+            (ref, False) for ref in self.__find_footnote_references__()
+        ]
 
+    def extract(self):
+        for wikicode, is_general_reference in self.find_references():
             reference = WikipediaReferenceV2(
-                wikicode=ref,
-                # wikibase=self.wikibase,
+                wikicode=wikicode,
                 testing=self.testing,
                 language_code=self.language_code,
+                is_general_reference=is_general_reference,
                 section=self.name,
             )
-
             reference.extract_and_check()
             self.references.append(reference)
 
-    def extract(self):
-        if not self.wikicode and not self.wikitext:
-            raise MissingInformationError(
-                "We need either wikicode or wikitext to continue"
-            )
-        self.__populate_wikitext__()
-        self.__parse_wikitext__()
-        self.__extract_all_general_references__()
-        self.__extract_all_footnote_references__()
+    def __iterate_lines__(self) -> Iterator[Tuple[str, Optional[List[Node]]]]:
+        """Walk the top level nodes of self.wikicode and yield every line
+        of the section together with the nodes that make up that line
+
+        Text nodes are split at the newlines. If another node spans more than
+        one line, the lines it touches get None instead of nodes."""
+        line_parts: List[str] = []
+        line_nodes: Optional[List[Node]] = []
+        for node in self.wikicode.nodes:
+            if isinstance(node, Text):
+                pieces = node.value.split("\n")
+                if len(pieces) == 1:
+                    line_parts.append(node.value)
+                    if line_nodes is not None:
+                        line_nodes.append(node)
+                    continue
+                for index, piece in enumerate(pieces):
+                    if index:
+                        yield "".join(line_parts), line_nodes
+                        line_parts = []
+                        line_nodes = []
+                    if piece:
+                        line_parts.append(piece)
+                        if line_nodes is not None:
+                            line_nodes.append(Text(piece))
+            else:
+                pieces = str(node).split("\n")
+                if len(pieces) == 1:
+                    line_parts.append(pieces[0])
+                    if line_nodes is not None:
+                        line_nodes.append(node)
+                    continue
+                for index, piece in enumerate(pieces):
+                    if index:
+                        yield "".join(line_parts), None
+                        line_parts = []
+                    line_parts.append(piece)
+                # the line we are on now started inside the node
+                line_nodes = None
+        yield "".join(line_parts), line_nodes
 
     def __populate_wikitext__(self):
         from src import app
         app.logger.debug("__populate_wikitext__: running")
 
-        if self.wikicode and not self.wikitext:
+        if self.wikicode is not None and not self.wikitext:
             self.wikitext = str(self.wikicode)
 
     def __parse_wikitext__(self):
         from src import app
         app.logger.debug("__parse_wikitext__: running")
 
-        if self.wikitext and not self.wikicode:
+        if self.wikitext and self.wikicode is None:
             self.wikicode = mwparserfromhell.parse(self.wikitext)
+
+
+def extract_reference_batch(
+    batch: List[Tuple[str, bool, str, str, bool]]
+) -> List[Optional[WikipediaReferenceV2]]:
+    """Extract a batch of references in a worker process of the extraction pool
+
+    Every item is the wikitext of a reference, whether it is a general reference,
+    the section name, the language code and testing.
+    The wikitext is parsed on its own here because the trees of the request process
+    are too expensive to send. For the same reason the references are returned
+    detached from their trees, see WikipediaReferenceV2.attach_wikicode().
+    None is returned for a footnote reference that does not parse back
+    into a single <ref> tag, the caller extracts those itself."""
+    references: List[Optional[WikipediaReferenceV2]] = []
+    for wikitext, is_general_reference, section, language_code, testing in batch:
+        wikicode = mwparserfromhell.parse(wikitext)
+        if not is_general_reference:
+            if len(wikicode.nodes) != 1 or not isinstance(wikicode.nodes[0], Tag):
+                references.append(None)
+                continue
+            wikicode = wikicode.nodes[0]
+        reference = WikipediaReferenceV2(
+            wikicode=wikicode,
+            testing=testing,
+            language_code=language_code,
+            is_general_reference=is_general_reference,
+            section=section,
+        )
+        reference.extract_and_check()
+        reference.detach_wikicode()
+        references.append(reference)
+    reference_cache.flush()
+    return references
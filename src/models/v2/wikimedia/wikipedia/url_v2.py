@@ -1,52 +1,97 @@
 import logging
 import re
+from functools import lru_cache
 from ipaddress import ip_address
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
 from urllib.parse import urlparse
 
 import validators  # type: ignore
-from pydantic import BaseModel
 from tld import get_fld
 from tld.exceptions import TldBadUrl, TldDomainNotFound
 
+from src.models.v2.base import IariRecord
 from src.models.wikimedia.wikipedia.enums import MalformedUrlError
 
 logger = logging.getLogger(__name__)
 
+# number of distinct raw urls each worker process keeps the analysis for
+URL_ANALYSIS_CACHE_SIZE = 50000
 
-class WikipediaUrlV2(BaseModel):
-    """models a Wikipedia URL
 
-    It uses BaseModel to avoid the cache attribute (vs IariBaseModel),
-    so we can output it via the API easily WTF?
+class UrlAnalysis(NamedTuple):
+    """The immutable result of analyzing a raw url
 
-    We do not perform any checking or lookup here that requires HTTP requests.
-    We only check based on the URL itself.
-    """
+    It only depends on the url string so it is shared
+    by every WikipediaUrlV2 with the same url"""
 
-    url: str
-    scheme: str = ""  # url scheme e.g. http
-    tld: str = ""  # top level domain
+    scheme: str = ""
+    tld: str = ""
     first_level_domain: str = ""
-    netloc: str = ""  # network location e.g. google.com
-    fld_is_ip: bool = False  # first level domain is an IP address
-
+    netloc: str = ""
+    fld_is_ip: bool = False
     malformed_url: bool = False
     malformed_url_details: Optional[MalformedUrlError] = None
     archived_url: str = ""
     wayback_machine_timestamp: str = ""
 
+
+class WikipediaUrlV2(IariRecord):
+    """models a Wikipedia URL
+
+    This is a light record instead of a pydantic model because we make
+    thousands of them per article, get_dict is what we output via the API
+
+    We do not perform any checking or lookup here that requires HTTP requests.
+    We only check based on the URL itself.
+    """
+
+    __slots__ = ("url",) + UrlAnalysis._fields
+
+    def __init__(
+        self,
+        url: str,
+        scheme: str = "",  # url scheme e.g. http
+        tld: str = "",  # top level domain
+        first_level_domain: str = "",
+        netloc: str = "",  # network location e.g. google.com
+        fld_is_ip: bool = False,  # first level domain is an IP address
+        malformed_url: bool = False,
+        malformed_url_details: Optional[MalformedUrlError] = None,
+        archived_url: str = "",
+        wayback_machine_timestamp: str = "",
+    ):
+        self.url = url
+        self.scheme = scheme
+        self.tld = tld
+        self.first_level_domain = first_level_domain
+        self.netloc = netloc
+        self.fld_is_ip = fld_is_ip
+        self.malformed_url = malformed_url
+        self.malformed_url_details = malformed_url_details
+        self.archived_url = archived_url
+        self.wayback_machine_timestamp = wayback_machine_timestamp
+
     @property
     def __is_wayback_machine_url__(self):
         return bool("//web.archive.org" in self.url)
 
     @property
     def get_dict(self) -> Dict[str, Any]:
-        url = self.dict()
+        url = self.get_fields()
         if self.malformed_url_details:
             url.update({"malformed_url_details": self.malformed_url_details.value})
         return url
 
+    @classmethod
+    def from_dict(cls, url: Dict[str, Any]) -> "WikipediaUrlV2":
+        """The url of a dict from get_dict"""
+        fields = dict(url)
+        if fields.get("malformed_url_details"):
+            fields["malformed_url_details"] = MalformedUrlError(
+                fields["malformed_url_details"]
+            )
+        return cls(**fields)
+
     def __hash__(self):
         return hash(self.url)
 
@@ -157,9 +202,35 @@ class WikipediaUrlV2(BaseModel):
         # logger.debug(f"Found FLD: {fld}")
         self.first_level_domain = fld
 
-    def extract(self):
-        from src import app
-
-        # app.logger.debug("==>  extract")
+    def __analyze__(self) -> UrlAnalysis:
+        """Run the analysis on this object and return the result"""
         self.__parse_extract_and_validate__()
         self.__extract_first_level_domain__()
+        return UrlAnalysis(*(getattr(self, field) for field in UrlAnalysis._fields))
+
+    def extract(self):
+        for field, value in zip(UrlAnalysis._fields, analyze_url(self.url)):
+            setattr(self, field, value)
+
+    @classmethod
+    def extract_many(cls, urls: Iterable[str]) -> List["WikipediaUrlV2"]:
+        """Extract a batch of raw urls
+
+        The objects are built directly from the cached analysis,
+        its fields are in the same order as the arguments after url"""
+        return [cls(url, *analyze_url(url)) for url in urls]
+
+
+@lru_cache(maxsize=URL_ANALYSIS_CACHE_SIZE)
+def analyze_url(url: str) -> UrlAnalysis:
+    """Analyze a raw url once per worker process
+
+    The same domains and archive urls show up in reference after reference,
+    so the urlparse, the wayback regex and the public suffix lookup in get_fld
+    are cached in a bounded LRU keyed by the raw url"""
+    return WikipediaUrlV2(url=url).__analyze__()
+
+
+def url_analysis_cache_info():
+    """Hits, misses, maxsize and currsize of the url analysis cache"""
+    return analyze_url.cache_info()
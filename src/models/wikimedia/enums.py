@@ -66,3 +66,10 @@ class RequestMethods(Enum):
     get = "get"
     post = "post"
 
+
+
+class ArticleStage(Enum):
+    # Parts of the /v2/article pipeline a patron can select with stages=
+    html = "html"  # fetch the html and extract the references we return from it
+    ores = "ores"  # fetch the ORES article quality prediction
+    wikitext = "wikitext"  # extract the references from the wikitext
@@ -2,11 +2,10 @@ import logging
 from datetime import datetime
 from typing import Any, Dict, Optional
 
-import requests
 from dateutil.parser import isoparse
 from pydantic import validate_arguments
 
-import config
+from src.helpers import http_client
 from src.models.api.job.article_job import ArticleJob
 from src.models.base import WariBaseModel
 from src.models.exceptions import MissingInformationError, WikipediaApiFetchError
@@ -191,7 +190,7 @@ class WikipediaArticle(WariBaseModel):
             #   https://ores.wikimedia.org/v3/scores/enwiki/234234320/articlequality
             # We only support Wikipedia for now
             wiki_project = f"{self.job.lang}wiki"
-            response = requests.get(
+            response = http_client.get(
                 f"https://ores.wikimedia.org/v3/scores/{wiki_project}/{self.revision_id}/articlequality"
             )
             if response.status_code == 200:
@@ -225,9 +224,8 @@ class WikipediaArticle(WariBaseModel):
         )
 
         prop = "ids|timestamp|content"
-        headers = {"User-Agent": config.user_agent}
-        response = requests.get(
-            url, params={"action": "query", "prop": prop}, headers=headers
+        response = http_client.get(
+            url, params={"action": "query", "prop": prop}
         )
         # console.print(response.json())
         if response.status_code == 200:
@@ -260,8 +258,7 @@ class WikipediaArticle(WariBaseModel):
             f"https://{self.job.lang}.{self.job.domain.value}/"
             f"w/rest.php/v1/page/{self.job.quoted_title}"
         )
-        headers = {"User-Agent": config.user_agent}
-        response = requests.get(url, headers=headers)
+        response = http_client.get(url)
         # console.print(response.json())
         if response.status_code == 200:
             data = response.json()
@@ -299,8 +296,7 @@ class WikipediaArticle(WariBaseModel):
             f"w/rest.php/v1/page/{self.job.quoted_title}/with_html"
         )
 
-        headers = {"User-Agent": config.user_agent}
-        response = requests.get(url, headers=headers)
+        response = http_client.get(url)
 
         # console.print(response.json())
         if response.status_code == 200:
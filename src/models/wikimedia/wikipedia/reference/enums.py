@@ -23,3 +23,9 @@ class FootnoteSubtype(Enum):
     CONTENT = (
         "content"  # this is footnotes marked up with <ref>this is content example</ref>
     )
+
+
+class UrlOrigin(Enum):
+    TEMPLATE = "template"  # a url parameter of a template like {{cite web|url=...}}
+    BARE = "bare"  # a bare url in the text outside templates
+    WIKICODED = "wikicoded"  # an external link like [http://example.com Example]
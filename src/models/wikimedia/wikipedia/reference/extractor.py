@@ -338,7 +338,7 @@ class WikipediaReferenceExtractor(WariBaseModel):
         app.logger.debug("==> __parse_html_source__")
 
         if self.html_source:
-            self.cite_page_refs = extract_cite_refs(self.html_source)
+            self.cite_page_refs = extract_cite_refs(self.html_source, pretty_html=True)
 
     @property
     def reference_ids(self) -> List[str]:
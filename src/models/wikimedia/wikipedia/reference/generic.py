@@ -3,11 +3,11 @@ import logging
 import re
 from typing import Any, Dict, List, Optional, Union
 
-from bs4 import BeautifulSoup, Comment
 from mwparserfromhell.nodes import Tag  # type: ignore
 from mwparserfromhell.wikicode import Wikicode  # type: ignore
 
 from config import regex_url_link_extraction
+from iarilib.parse_utils import extract_comments, extract_ref_name
 from src.models.base.job import JobBaseModel
 from src.models.exceptions import MissingInformationError
 from src.models.wikimedia.wikipedia.reference.enums import (
@@ -60,8 +60,7 @@ class WikipediaReference(JobBaseModel):
     section: str
     section_id: str
 
-    soup: Optional[Any] = None
-    comments: Optional[List[Comment]] = None
+    comments: Optional[List[str]] = None
 
     # TODO REMOVE ref_counter_index: int = 0
 
@@ -70,25 +69,7 @@ class WikipediaReference(JobBaseModel):
 
     @property
     def get_name(self) -> str:
-        if not self.soup:
-            raise MissingInformationError()
-        # Find the <ref> tag
-        ref_tag = self.soup.find("ref")
-        if ref_tag:
-            # Extract the value of the 'name' attribute
-            name = str(ref_tag.get("name"))  # type: ignore # see https://github.com/python/typeshed/issues/8356
-            if name.endswith("\\"):
-                # Cut off the trailing backward slash
-                name = name[:-1]
-            if name.endswith("/"):
-                # Cut off the trailing forward slash
-                name = name[:-1]
-            if name == "None" or name is None:
-                return ""
-            else:
-                return name
-        else:
-            return ""
+        return extract_ref_name(self.wikicode)
 
     @property
     def reference_type(self) -> Optional[ReferenceType]:
@@ -178,9 +159,6 @@ class WikipediaReference(JobBaseModel):
             return 0
         return len(self.templates)
 
-    def __parse_xhtml__(self):
-        self.soup = BeautifulSoup(str(self.wikicode), "lxml")
-
     def __extract_template_urls__(self) -> None:
         self.template_urls = []
         urls = []
@@ -413,8 +391,7 @@ class WikipediaReference(JobBaseModel):
 
         app.logger.debug("==> extract_and_check")
 
-        self.__parse_xhtml__()  # sets local self.soup to parsed xml of ref element
-        self.__extract_xhtml_comments__()  # TODO ?? what does this do with results??? is this useless?
+        self.__extract_comments__()
 
         self.__identify_reference_type__()  # set attributes for reference
 
@@ -429,11 +406,9 @@ class WikipediaReference(JobBaseModel):
         the raw wikitext for this reference"""
         self.reference_id = hashlib.md5(f"{self.wikicode}".encode()).hexdigest()[:8]
 
-    def __extract_xhtml_comments__(self):
-        if not self.soup:
-            raise MissingInformationError("soup not defined for generic reference.")
-        # Find all comment tags in the HTML
-        return self.soup.find_all(text=lambda text: isinstance(text, Comment))
+    def __extract_comments__(self):
+        """Extract the html comments straight from the wikicode"""
+        self.comments = extract_comments(self.wikicode)
 
     def __identify_reference_type__(self):
         """set is_named_reused_reference"""
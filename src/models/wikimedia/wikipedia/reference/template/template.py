@@ -1,11 +1,11 @@
 import logging
-import re
 from collections import OrderedDict
 from typing import Any, Dict, List
 
 from mwparserfromhell.nodes import Template  # type: ignore
 from pydantic import BaseModel, validate_arguments
 
+from iarilib.parse_utils import remove_html_comments
 from src.models.exceptions import MissingInformationError
 from src.models.wikimedia.wikipedia.url import WikipediaUrl
 
@@ -100,24 +100,8 @@ class WikipediaTemplate(BaseModel):
 
     @staticmethod
     def __remove_comments__(text: str):
-        """Remove html comments <!-- -->
-        Copyright pywikibot authors"""
-        # This regex tries to match text on both sides of
-        # the comment and join them or in the case no comment is found
-        # just return the whole thing.
-        regex = re.compile(r"(.*)<!--.*-->(.*)|(.*)")
-        matches = re.findall(pattern=regex, string=text)
-        if matches:
-            # print(match.groups())
-            string = ""
-            for match in matches:
-                # print(match)
-                if match:
-                    for part in match:
-                        string += str(part)
-            return string.strip()
-        else:
-            return text
+        """Remove html comments <!-- --> and surrounding whitespace"""
+        return remove_html_comments(text).strip()
 
     # noinspection PyShadowingNames
     @staticmethod
@@ -10,10 +10,10 @@ from datetime import datetime
 from typing import Any, Dict, Optional
 
 import aiohttp
-import requests
 from flask_restful import Resource, abort  # type: ignore
 from marshmallow import Schema
 
+from src.helpers import http_client
 from src.models.api.job.check_urls_job import UrlsJob
 from src.models.api.schema.check_urls_schema import UrlsSchema
 
@@ -206,7 +206,7 @@ class CheckUrls(StatisticsWriteView):
         # TODO there should really be a "timeout" parameter sent to iabot/testdeadlink, but currently not supported
         data = f"urls={search_urls_param}&authcode={testdeadlink_api_key}&returncodes=1"
 
-        response = requests.post(
+        response = http_client.post(
             "https://iabot-api.archive.org/testdeadlink.php",
             headers=headers,
             data=data,
@@ -27,17 +27,12 @@ class References(StatisticsView):
         references = article_file_io.data["references"]
         # get the references details
         details = []
+        reference_file_ios = []
         if self.job.all:
             for reference in references:
                 if "id" not in reference or not reference["id"]:
                     raise MissingInformationError()
-                reference_file_io = ReferenceFileIo(hash_based_id=reference["id"])
-                reference_file_io.read_from_disk()
-                data = reference_file_io.data
-                if not data:
-                    return "No json in cache", 404
-                # convert to dehydrated reference:
-                details.append(data)
+                reference_file_ios.append(ReferenceFileIo(hash_based_id=reference["id"]))
         else:
             # We use offset and chunk size
             for reference in references[
@@ -47,12 +42,14 @@ class References(StatisticsView):
                     raise MissingInformationError("reference was empty")
                 if not isinstance(reference, dict):
                     raise TypeError(f"has was: {reference}")
-                reference_file_io = ReferenceFileIo(hash_based_id=reference["id"])
-                reference_file_io.read_from_disk()
-                data = reference_file_io.data
-                if not data:
-                    return "No json in cache", 404
-                # convert to dehydrated reference:
-                details.append(data)
+                reference_file_ios.append(ReferenceFileIo(hash_based_id=reference["id"]))
+        # read them all at once, the sqlite cache store does it in one query
+        ReferenceFileIo.read_many_from_disk(reference_file_ios)
+        for reference_file_io in reference_file_ios:
+            data = reference_file_io.data
+            if not data:
+                return "No json in cache", 404
+            # convert to dehydrated reference:
+            details.append(data)
         data = {"total": len(references), "references": details}
         return data, 200
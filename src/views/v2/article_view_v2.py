@@ -4,6 +4,8 @@ from datetime import datetime
 from typing import Any, Optional, Tuple
 import traceback
 
+from flask import Response, request
+
 from src.models.exceptions import MissingInformationError, WikipediaApiFetchError
 from src.models.v2.file_io.article_file_io_v2 import ArticleFileIoV2
 from src.models.v2.job.article_job_v2 import ArticleJobV2
@@ -14,6 +16,14 @@ from src.views.v2.statistics import StatisticsViewV2
 
 from src.helpers.get_version import get_poetry_version
 
+# Everything we return for a revision is made from that revision only, see WikipediaArticleSourceV2
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# a fresh result is rewritten when the patron asks again with refresh,
+# so clients and proxies revalidate it until it comes from our cache
+FRESH_CACHE_CONTROL = "no-cache"
+# cached json is returned as it is stored, so this header tells whether it came from the cache
+SERVED_FROM_CACHE_HEADER = "X-Served-From-Cache"
+
 
 class ArticleV2(StatisticsViewV2):
     """
@@ -36,22 +46,53 @@ class ArticleV2(StatisticsViewV2):
 
         app.logger.debug("ArticleV2::__return_article_data__")
 
+        # if the patron asked for a revision the cached result never changes
+        # and can be cached by clients and proxies without revalidation
+        revision_pinned = bool(self.job.revision)
+
+        # resolve page id, revision and wikitext once,
+        # the io and the analyzer get copies of the job that share the fetched source
+        self.job.get_mediawiki_ids()
+        if self.job.source and not self.job.source.found_in_wikipedia:
+            return AnalyzerReturnValues.NOT_FOUND.value, 404
+
         self.__setup_io__()
 
-        if not self.job.refresh:
-            self.__read_from_cache__()  # inherited from StatisticsWriteView; fills io.data if successful
+        headers = {}
 
-        # if self.io.data and not self.job.refresh:
-        if self.io.data:
-            # cached data has been successfully retrieved - return it
-            app.logger.info(
-                f"Returning cached articleV2 json data, date: {self.time_of_analysis}"
+        if not self.job.refresh:
+            # the stored bytes are returned as they are, decoding and encoding
+            # multi-megabyte json was most of the time spent on a cache hit
+            # and compressed json is sent as it is stored if the patron accepts it
+            cached_json, content_encoding = self.io.read_bytes_from_disk(
+                accept_encodings=[
+                    encoding
+                    for encoding in ("gzip", "zstd")
+                    if request.accept_encodings[encoding]
+                ]
             )
-            return self.io.data, 200
+            if cached_json:
+                app.logger.info("Returning cached articleV2 json data")
+                headers[SERVED_FROM_CACHE_HEADER] = "true"
+                headers["Vary"] = "Accept-Encoding"
+                # the cache id only matches files written since the html
+                # is fetched for the revision, see ArticleJobV2.cache_id
+                if revision_pinned:
+                    headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+                if content_encoding:
+                    headers["Content-Encoding"] = content_encoding
+                return Response(
+                    cached_json, status=200, headers=headers, mimetype="application/json"
+                )
 
         # no cached data, either cause it doesnt exist or force refresh = true
         app.logger.info("generating articleV2 data (force refresh or no cache)")
-        return self.__analyze_and_write_and_return__()
+        data, status_code = self.__analyze_and_write_and_return__()
+        if status_code != 200:
+            return data, status_code
+        headers[SERVED_FROM_CACHE_HEADER] = "false"
+        headers["Cache-Control"] = FRESH_CACHE_CONTROL
+        return data, status_code, headers
 
     def get(self):
         """
@@ -161,7 +202,8 @@ class ArticleV2(StatisticsViewV2):
     def __write_article_to_disk__(self):
         article_io = ArticleFileIoV2(
             job=self.job,
-            data=self.io.data,
+            # whoever reads this file again is served from the cache
+            data=dict(self.io.data, served_from_cache=True),
             wari_id=self.job.iari_id,  # defined in ArticleJobV2
         )
         article_io.write_to_disk()
@@ -6,9 +6,7 @@ import traceback
 
 from dateutil.parser import isoparse
 
-import config
-import requests
-
+from src.helpers import http_client
 from src.models.exceptions import MissingInformationError, WikipediaApiFetchError
 
 from src.models.v2.schema.editref_schema_v2 import EditRefSchemaV2
@@ -128,8 +126,7 @@ class EditRefV2(StatisticsViewV2):
                 f"https://{self.job.wiki_lang}.{self.job.wiki_domain.value}/"
                 f"w/rest.php/v1/page/{self.job.quoted_title}"
             )
-            headers = {"User-Agent": config.user_agent}
-            response = requests.get(url, headers=headers)
+            response = http_client.get(url)
 
             # console.print(response.json())
             app.logger.debug(f"==> EditRefV2::__setup_source_text__: url to grab is: {url}")
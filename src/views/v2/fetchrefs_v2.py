@@ -21,7 +21,7 @@ from src.models.v2.wikimedia.wikipedia.article_v2 import WikipediaArticleV2
 from src.models.wikimedia.wikipedia.article import WikipediaArticle
 
 from src.views.v2.statistics import StatisticsViewV2
-from src.models.wikimedia.enums import RequestMethods
+from src.models.wikimedia.enums import ArticleStage, RequestMethods
 
 
 class FetchRefsV2(StatisticsViewV2):
@@ -100,7 +100,8 @@ class FetchRefsV2(StatisticsViewV2):
             url_template = "https://{lang}.{wiki_domain}/wiki/{page_title}"  # TODO make this a global
             page_url = url_template.format(page_title=page_title, lang="en", wiki_domain="wikipedia.org")
 
-            article_job = ArticleJobV2(url=page_url)
+            # we only return the references found in the wikitext
+            article_job = ArticleJobV2(url=page_url, stages=[ArticleStage.wikitext])
             article_job.__extract_url__()
 
             # get article object corresponding to page
@@ -0,0 +1,75 @@
+"""Benchmark of the wikitext extraction of /v2/article
+
+Run it from the root of the repository with
+    python -m tests.benchmark_extraction_v2
+
+For every article in test_data/test_content it reports the best time
+of the extraction, the objects tracked by the garbage collector and the
+memory still allocated for what was extracted, see IariRecord for why the
+records of the extraction are not pydantic models."""
+import gc
+import logging
+import time
+import tracemalloc
+from typing import Dict
+
+from src import app
+from src.helpers import process_pool
+from src.models.v2.job.article_job_v2 import ArticleJobV2
+from src.models.v2.wikimedia.wikipedia.reference.extractor_v2 import (
+    WikipediaReferenceExtractorV2,
+)
+from test_data import test_content
+
+REPEAT = 5
+articles: Dict[str, str] = {
+    "easter_island_excerpt": test_content.easter_island_head_excerpt
+    + "\n"
+    + test_content.easter_island_tail_excerpt,
+    "electrical_breakdown": test_content.electrical_breakdown_full_article,
+    "test_full_article": test_content.test_full_article,
+}
+# a long article like the ones we spend most time on
+articles["all_of_the_above_x20"] = "\n".join(articles.values()) * 20
+
+
+def extract(wikitext: str) -> WikipediaReferenceExtractorV2:
+    extractor = WikipediaReferenceExtractorV2(
+        wikitext=wikitext,
+        job=ArticleJobV2(url="https://en.wikipedia.org/wiki/Test"),
+    )
+    extractor.extract_all_references()
+    return extractor
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    # we measure the extraction itself in this process
+    process_pool.EXTRACTION_WORKERS = 0
+    print(f"{'article':<24}{'references':>12}{'seconds':>10}{'objects':>10}{'KiB':>10}")
+    with app.app_context():
+        for name, wikitext in articles.items():
+            seconds = float("inf")
+            for _ in range(REPEAT):
+                start = time.perf_counter()
+                extractor = extract(wikitext=wikitext)
+                seconds = min(seconds, time.perf_counter() - start)
+            del extractor
+            gc.collect()
+            objects = len(gc.get_objects())
+            tracemalloc.start()
+            extractor = extract(wikitext=wikitext)
+            gc.collect()
+            allocated = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            objects = len(gc.get_objects()) - objects
+            print(
+                f"{name:<24}{len(extractor.references):>12}{seconds:>10.3f}"
+                f"{objects:>10}{allocated / 1024:>10.0f}"
+            )
+            del extractor
+            gc.collect()
+
+
+if __name__ == "__main__":
+    main()
@@ -37,7 +37,8 @@ class TestArticleFileIo(TestCase):
         )
         print(io1.data)
         io1.write_to_disk()
-        assert exists(io1.path_filename) is True
+        # stored compressed, see cache_encoding
+        assert exists(f"{io1.path_filename}.gz") is True
 
     @pytest.mark.skipif(
         "GITHUB_ACTIONS" in os.environ, reason="test is skipped in GitHub Actions"
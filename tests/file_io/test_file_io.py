@@ -0,0 +1,142 @@
+import gzip
+import json
+import os
+import stat
+import threading
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+
+import config
+from src import app
+from src.helpers import cache_encoding, cache_layout
+from src.models.file_io import FileIo
+
+data = {"title": "Ä test", "references": [{"id": 1}] * 3}
+shard = cache_layout.shard("test.json")
+
+
+class TestFileIo(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.patch = patch.object(
+            config, "subdirectory_for_json", f"{self.directory.name}/"
+        )
+        self.patch.start()
+        self.context = app.app_context()
+        self.context.push()
+
+    def tearDown(self):
+        self.context.pop()
+        self.patch.stop()
+        self.directory.cleanup()
+
+    def __stored__(self):
+        return sorted(
+            os.path.relpath(os.path.join(folder, filename), self.directory.name)
+            for folder, _, filenames in os.walk(self.directory.name)
+            for filename in filenames
+        )
+
+    def test_write_compact_and_compressed(self):
+        FileIo(wari_id="test", data=data).write_to_disk()
+        assert self.__stored__() == [f"{shard}test.json.gz"]
+        with open(f"{self.directory.name}/{shard}test.json.gz", "rb") as file:
+            raw = gzip.decompress(file.read())
+        assert raw == json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+        io = FileIo(wari_id="test")
+        io.read_from_disk()
+        assert io.data == dict(data, served_from_cache=True)
+
+    def test_read_plain_json_of_older_versions(self):
+        with open(f"{self.directory.name}/test.json", "w") as file:
+            json.dump(data, file, ensure_ascii=False, indent=4)
+        io = FileIo(wari_id="test")
+        io.read_from_disk()
+        assert io.data == dict(data, served_from_cache=True)
+        raw, encoding = io.read_bytes_from_disk(accept_encodings=["gzip"])
+        assert encoding == ""
+        assert json.loads(raw) == data
+
+        # writing replaces the plain file
+        FileIo(wari_id="test", data=data).write_to_disk()
+        assert self.__stored__() == [f"{shard}test.json.gz"]
+
+    def test_read_bytes(self):
+        io = FileIo(wari_id="test", data=data)
+        assert io.read_bytes_from_disk() == (None, "")
+        io.write_to_disk()
+        raw, encoding = io.read_bytes_from_disk(accept_encodings=["gzip"])
+        assert encoding == "gzip"
+        assert json.loads(gzip.decompress(raw)) == data
+        raw, encoding = io.read_bytes_from_disk()
+        assert encoding == ""
+        assert json.loads(raw) == data
+
+    def test_plain_json(self):
+        with patch.object(cache_encoding, "CACHE_COMPRESSION", "none"):
+            FileIo(wari_id="test", data=data).write_to_disk()
+            assert self.__stored__() == [f"{shard}test.json"]
+            io = FileIo(wari_id="test")
+            io.read_from_disk()
+        assert io.data == dict(data, served_from_cache=True)
+
+    def test_zstd(self):
+        pytest.importorskip("zstandard")
+        with patch.object(cache_encoding, "CACHE_COMPRESSION", "zstd"):
+            FileIo(wari_id="test", data=data).write_to_disk()
+            assert self.__stored__() == [f"{shard}test.json.zst"]
+            io = FileIo(wari_id="test")
+            io.read_from_disk()
+        assert io.data == dict(data, served_from_cache=True)
+
+    def test_zstd_falls_back_to_gzip(self):
+        with patch.object(cache_encoding, "CACHE_COMPRESSION", "zstd"), patch.object(
+            cache_encoding, "zstandard", None
+        ):
+            assert cache_encoding.write_encoding() == "gzip"
+            assert "zstd" not in cache_encoding.read_encodings()
+
+    def test_write_is_atomic(self):
+        FileIo(wari_id="test", data=data).write_to_disk()
+        with patch.object(os, "fsync", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                FileIo(wari_id="test", data={"title": "new"}).write_to_disk()
+        # the old file is intact and the temporary file is gone
+        assert self.__stored__() == [f"{shard}test.json.gz"]
+        io = FileIo(wari_id="test")
+        io.read_from_disk()
+        assert io.data == dict(data, served_from_cache=True)
+        mode = os.stat(f"{self.directory.name}/{shard}test.json.gz").st_mode
+        assert stat.S_IMODE(mode) == 0o644
+
+    def test_concurrent_writers_and_readers(self):
+        versions = [dict(data, version=version) for version in range(4)]
+        errors = []
+
+        def write(version):
+            try:
+                for _ in range(25):
+                    FileIo(wari_id="test", data=versions[version]).write_to_disk()
+            except Exception as e:
+                errors.append(e)
+
+        writers = [threading.Thread(target=write, args=(v,)) for v in range(4)]
+        for writer in writers:
+            writer.start()
+        reads = 0
+        while any(writer.is_alive() for writer in writers):
+            io = FileIo(wari_id="test")
+            io.read_from_disk()
+            if io.data:
+                del io.data["served_from_cache"]
+                assert io.data in versions
+                reads += 1
+        for writer in writers:
+            writer.join()
+        assert not errors
+        assert reads
+        assert self.__stored__() == [f"{shard}test.json.gz"]
@@ -0,0 +1,112 @@
+from typing import Any, Dict, List
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+
+from src import app
+from src.helpers import http_client
+from src.models.exceptions import WikipediaApiFetchError
+from src.models.v2.wikimedia.wikipedia.article_source_v2 import (
+    WikipediaArticleSourceV2,
+)
+
+base_url = "https://en.wikipedia.org/w/rest.php/v1"
+html = (
+    '<div class="mw-references-wrap"><ol class="references">'
+    '<li id="cite_note-1" about="#cite_note-1"><span class="mw-reference-text">'
+    '<cite id="a"><a href="http://example.com/a">A</a></cite></span></li>'
+    "</ol></div>"
+)
+
+
+class FakeResponse:
+    def __init__(self, data: Dict[str, Any], status_code: int = 200):
+        self.data = data
+        self.status_code = status_code
+
+    def json(self):
+        return self.data
+
+
+class FakeWikipedia:
+    """Answers like the MediaWiki REST API, the latest revision is 3"""
+
+    def __init__(self):
+        self.urls: List[str] = []
+
+    def get(self, url: str, **kwargs) -> FakeResponse:
+        self.urls.append(url)
+        latest = {"id": 3, "timestamp": "2023-01-03T00:00:00Z"}
+        if url == f"{base_url}/page/Test":
+            return FakeResponse({"id": 1, "latest": latest, "source": "Text"})
+        if url == f"{base_url}/page/Test/with_html":
+            return FakeResponse({"id": 1, "latest": latest, "html": "latest"})
+        if url.startswith(f"{base_url}/revision/"):
+            revision = int(url.split("/")[-2 if url.endswith("/with_html") else -1])
+            if url.endswith("/with_html"):
+                return FakeResponse({"id": revision, "html": html})
+            return FakeResponse(
+                {
+                    "id": revision,
+                    "page": {"id": 1},
+                    "timestamp": "2023-01-02T00:00:00Z",
+                    "source": "Text",
+                }
+            )
+        return FakeResponse({}, status_code=404)
+
+
+class TestWikipediaArticleSourceV2(TestCase):
+    def setUp(self):
+        self.wikipedia = FakeWikipedia()
+        self.patch = patch.object(http_client, "get", self.wikipedia.get)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+
+    def test_html_of_the_latest_revision_is_pinned(self):
+        source = WikipediaArticleSourceV2(title="Test")
+        with app.app_context():
+            source.fetch_wikitext()
+            source.fetch_html()
+        assert source.revision == 3
+        assert self.wikipedia.urls == [
+            f"{base_url}/page/Test",
+            f"{base_url}/revision/3/with_html",
+        ]
+        assert source.html_markup == html
+
+    def test_html_of_a_revision(self):
+        source = WikipediaArticleSourceV2(title="Test", revision=2)
+        with app.app_context():
+            source.fetch_html()
+        assert self.wikipedia.urls == [f"{base_url}/revision/2/with_html"]
+
+    def test_html_without_a_revision_fetches_the_wikitext_first(self):
+        source = WikipediaArticleSourceV2(title="Test")
+        with app.app_context():
+            source.fetch_html()
+        assert source.revision == 3
+        assert self.wikipedia.urls == [
+            f"{base_url}/page/Test",
+            f"{base_url}/revision/3/with_html",
+        ]
+
+    def test_html_of_another_revision(self):
+        self.wikipedia.get = lambda url, **kwargs: FakeResponse({"id": 4, "html": html})
+        source = WikipediaArticleSourceV2(title="Test", revision=2, wikitext_fetched=True)
+        with pytest.raises(WikipediaApiFetchError), patch.object(
+            http_client, "get", self.wikipedia.get
+        ), app.app_context():
+            source.fetch_html()
+
+    def test_html_not_found(self):
+        self.wikipedia.get = lambda url, **kwargs: FakeResponse({}, status_code=404)
+        source = WikipediaArticleSourceV2(title="Test", revision=2, wikitext_fetched=True)
+        with pytest.raises(WikipediaApiFetchError), patch.object(
+            http_client, "get", self.wikipedia.get
+        ), app.app_context():
+            source.fetch_html()
+        assert source.html_fetched is False
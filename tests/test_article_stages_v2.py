@@ -0,0 +1,98 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from src import app
+from src.models.v2.job.article_job_v2 import ArticleJobV2
+from src.models.v2.schema.article_schema_v2 import ArticleSchemaV2
+from src.models.v2.wikimedia.wikipedia.article_v2 import WikipediaArticleV2
+from src.models.wikimedia.enums import ArticleStage
+
+wikitext = "Text<ref>{{cite web|url=http://example.com/a|title=A}}</ref>\n"
+html = (
+    '<div class="mw-references-wrap"><ol class="references">'
+    '<li id="cite_note-1" about="#cite_note-1"><span class="mw-reference-text">'
+    '<cite id="a"><a href="http://example.com/a">A</a></cite></span></li>'
+    "</ol></div>"
+)
+
+
+class TestArticleStagesV2(TestCase):
+    def test_schema_default_stages(self):
+        with app.app_context():
+            job = ArticleSchemaV2().load({"url": "https://en.wikipedia.org/wiki/Test"})
+        assert job.stages == [ArticleStage.html, ArticleStage.ores]
+
+    def test_schema_stages(self):
+        with app.app_context():
+            job = ArticleSchemaV2().load(
+                {"url": "https://en.wikipedia.org/wiki/Test", "stages": "wikitext, html"}
+            )
+        assert job.stages == [ArticleStage.wikitext, ArticleStage.html]
+
+    def test_schema_invalid_stage(self):
+        errors = ArticleSchemaV2().validate(
+            {"url": "https://en.wikipedia.org/wiki/Test", "stages": "html,bogus"}
+        )
+        assert "stages" in errors
+
+    def test_cache_id(self):
+        job = ArticleJobV2(lang="en", page_id=1, revision=2)
+        assert job.cache_id == "en.wikipedia.org.1.2.compact"
+        job.stages = [ArticleStage.ores, ArticleStage.html]
+        assert job.cache_id == "en.wikipedia.org.1.2.compact"
+        job.stages = [ArticleStage.wikitext, ArticleStage.html, ArticleStage.ores]
+        assert job.cache_id == "en.wikipedia.org.1.2.html-ores-wikitext.compact"
+        job.stages = [ArticleStage.html]
+        assert job.cache_id == "en.wikipedia.org.1.2.html.compact"
+        job.pretty_html = True
+        assert job.cache_id == "en.wikipedia.org.1.2.html.pretty"
+        job.stages = [ArticleStage.html, ArticleStage.ores]
+        job.omit_html = True
+        assert job.cache_id == "en.wikipedia.org.1.2.nohtml"
+
+    @staticmethod
+    def __fetch_and_parse__(stages, **options) -> WikipediaArticleV2:
+        article = WikipediaArticleV2(
+            job=ArticleJobV2(
+                url="https://en.wikipedia.org/wiki/Test",
+                title="Test",
+                revision=1,
+                stages=stages,
+                **options,
+            ),
+            wikitext=wikitext,
+            html_markup=html,
+        )
+        with app.app_context(), patch.object(
+            WikipediaArticleV2, "__get_ores_scores__"
+        ) as get_ores_scores:
+            article.fetch_and_parse()
+        article.debug_info = {"ores_calls": get_ores_scores.call_count}
+        return article
+
+    def test_default_stages_skip_the_wikitext_extraction(self):
+        article = self.__fetch_and_parse__(
+            stages=[ArticleStage.html, ArticleStage.ores]
+        )
+        assert article.extractor is None
+        assert article.debug_info["ores_calls"] == 1
+        assert article.reference_count == 1
+        assert article.references[0]["urls"] == ["http://example.com/a"]
+
+    def test_wikitext_stage_only(self):
+        article = self.__fetch_and_parse__(stages=[ArticleStage.wikitext])
+        assert article.extractor is not None
+        assert article.extractor.number_of_references == 1
+        assert article.debug_info["ores_calls"] == 0
+        assert article.reference_count == 0
+
+    def test_html_options(self):
+        stages = [ArticleStage.html]
+        compact = self.__fetch_and_parse__(stages=stages).references[0]
+        assert compact["cite_html"] == '<cite id="a"><a href="http://example.com/a">A</a></cite>'
+        pretty = self.__fetch_and_parse__(stages=stages, pretty_html=True).references[0]
+        assert pretty["cite_html"].startswith('<cite id="a">\n <a href=')
+        omitted = self.__fetch_and_parse__(stages=stages, omit_html=True).references[0]
+        assert omitted["cite_html"] is None
+        assert omitted["span_html"] is None
+        assert omitted["urls"] == ["http://example.com/a"]
@@ -0,0 +1,69 @@
+from datetime import datetime
+from unittest import TestCase
+
+import pytest
+
+from src import app
+from src.models.v2.job.article_job_v2 import ArticleJobV2
+from src.models.v2.statistics.article_stats_v2 import ArticleStatisticsV2
+from src.models.v2.wikimedia.wikipedia.analyzer_v2 import WikipediaAnalyzerV2
+from src.models.v2.wikimedia.wikipedia.article_v2 import WikipediaArticleV2
+from src.models.wikimedia.enums import ArticleStage
+
+wikitext = "Text<ref>{{cite web|url=http://example.com/a|title=A}}</ref>\n"
+html = (
+    '<div class="mw-references-wrap"><ol class="references">'
+    '<li id="cite_note-1" about="#cite_note-1"><span class="mw-reference-text">'
+    '<link data-mw=\'{"parts":[{"template":{"target":{"wt":"cite web"},'
+    '"params":{"url":{"wt":"http://example.com/a"}}}}]}\'/>'
+    '<cite id="a" class="citation web"><a href="http://example.com/a">A</a></cite>'
+    "</span></li></ol></div>"
+)
+
+
+class TestArticleStatisticsV2(TestCase):
+    def test_build_dict_is_the_same_as_dict(self):
+        fields = dict(
+            iari_id="en.wikipedia.org.1.2",
+            page_id=1,
+            revision_id=2,
+            ores_score={"prediction": "B"},
+            references=[{"ref_id": 1, "templates": [{"name": "cite web"}]}],
+            urls=["http://example.com/a"],
+        )
+        data = ArticleStatisticsV2.build_dict(**fields)
+        assert data == ArticleStatisticsV2(**fields).dict()
+        assert list(data) == list(ArticleStatisticsV2.__fields__)
+        # nothing is copied
+        assert data["references"] is fields["references"]
+
+    def test_build_dict_unknown_field(self):
+        with pytest.raises(ValueError):
+            ArticleStatisticsV2.build_dict(wari_id="test")
+
+    def test_analyzer_output_conforms(self):
+        job = ArticleJobV2(
+            url="https://en.wikipedia.org/wiki/Test",
+            title="Test",
+            page_id=1,
+            revision=2,
+            stages=[ArticleStage.html],
+        )
+        analyzer = WikipediaAnalyzerV2(
+            job=job,
+            article=WikipediaArticleV2(
+                job=job,
+                wikitext=wikitext,
+                html_markup=html,
+                page_id=1,
+                revision_isodate=datetime(2023, 1, 1),
+                revision_timestamp=1672531200,
+            ),
+        )
+        with app.app_context():
+            data = analyzer.get_article_data()
+        assert data == ArticleStatisticsV2(**data).dict()
+        assert data["iari_id"] == "en.wikipedia.org.1.2"
+        assert data["reference_count"] == 1
+        assert data["references"][0]["template_urls"] == ["http://example.com/a"]
+        assert data["urls"] == ["http://example.com/a"]
@@ -0,0 +1,101 @@
+import gzip
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+import config
+from src import app
+from src.helpers import cache_layout, http_client
+from src.views.v2.article_view_v2 import (
+    FRESH_CACHE_CONTROL,
+    IMMUTABLE_CACHE_CONTROL,
+    SERVED_FROM_CACHE_HEADER,
+)
+from tests.test_article_source_v2 import FakeWikipedia
+
+url = "https://en.wikipedia.org/wiki/Test"
+
+
+class TestArticleV2(TestCase):
+    def setUp(self):
+        self.wikipedia = FakeWikipedia()
+        self.client = app.test_client()
+        self.patch = patch.object(http_client, "get", self.wikipedia.get)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+
+    def test_cached_article_of_a_revision_is_immutable(self):
+        with TemporaryDirectory() as directory, patch.object(
+            config, "subdirectory_for_json", f"{directory}/"
+        ):
+            os.makedirs(f"{directory}/articlesV2")
+            response = self.client.get(
+                f"/v2/article?url={url}&revision=2&refresh=true&stages=html"
+            )
+            assert response.status_code == 200
+            assert response.headers["Cache-Control"] == FRESH_CACHE_CONTROL
+            assert response.get_json()["revision_id"] == 2
+            response = self.client.get(f"/v2/article?url={url}&revision=2&stages=html")
+            assert response.status_code == 200
+            assert response.headers[SERVED_FROM_CACHE_HEADER] == "true"
+            assert response.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+            response = self.client.get(f"/v2/article?url={url}&stages=html")
+            assert response.status_code == 200
+            assert response.headers[SERVED_FROM_CACHE_HEADER] == "false"
+            assert response.headers["Cache-Control"] == FRESH_CACHE_CONTROL
+            assert response.get_json()["revision_id"] == 3
+            response = self.client.get(f"/v2/article?url={url}&stages=html")
+            assert response.headers[SERVED_FROM_CACHE_HEADER] == "true"
+            assert "Cache-Control" not in response.headers
+
+    def test_article_cached_by_older_versions_is_analyzed_again(self):
+        with TemporaryDirectory() as directory, patch.object(
+            config, "subdirectory_for_json", f"{directory}/"
+        ):
+            os.makedirs(f"{directory}/articlesV2")
+            # named by the plain iari_id, from the html of the latest revision
+            with open(f"{directory}/articlesV2/en.wikipedia.org.1.2.json", "w") as file:
+                json.dump({"revision_id": 2, "served_from_cache": False}, file, indent=4)
+            response = self.client.get(f"/v2/article?url={url}&revision=2")
+            assert response.status_code == 200
+            assert response.headers[SERVED_FROM_CACHE_HEADER] == "false"
+            assert response.headers["Cache-Control"] == FRESH_CACHE_CONTROL
+            assert "references" in response.get_json()
+
+    def test_cached_article_is_returned_as_stored(self):
+        with TemporaryDirectory() as directory, patch.object(
+            config, "subdirectory_for_json", f"{directory}/"
+        ):
+            os.makedirs(f"{directory}/articlesV2")
+            analyzed = self.client.get(f"/v2/article?url={url}&stages=html")
+            assert analyzed.status_code == 200
+            assert analyzed.headers[SERVED_FROM_CACHE_HEADER] == "false"
+            assert analyzed.get_json()["served_from_cache"] is False
+            filename = "en.wikipedia.org.1.3.html.compact.json"
+            with open(
+                f"{directory}/articlesV2/{cache_layout.shard(filename)}{filename}.gz", "rb"
+            ) as file:
+                stored = file.read()
+
+            cached = self.client.get(f"/v2/article?url={url}&stages=html")
+            assert cached.status_code == 200
+            assert cached.headers[SERVED_FROM_CACHE_HEADER] == "true"
+            assert cached.mimetype == "application/json"
+            assert "Content-Encoding" not in cached.headers
+            assert cached.data == gzip.decompress(stored)
+            data = json.loads(cached.data)
+            assert data["served_from_cache"] is True
+            assert data["references"] == analyzed.get_json()["references"]
+
+            compressed = self.client.get(
+                f"/v2/article?url={url}&stages=html",
+                headers={"Accept-Encoding": "gzip, deflate, br"},
+            )
+            assert compressed.status_code == 200
+            assert compressed.headers["Content-Encoding"] == "gzip"
+            assert compressed.headers["Vary"] == "Accept-Encoding"
+            assert compressed.data == stored
@@ -0,0 +1,92 @@
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+import config
+from src import app
+from src.helpers import cache_layout
+from src.models.file_io import FileIo
+from src.models.file_io.url_archive_file_io import UrlArchiveFileIo
+from src.models.file_io.url_file_io import UrlFileIo
+
+
+class TestCacheLayout(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.patch = patch.object(
+            config, "subdirectory_for_json", f"{self.directory.name}/"
+        )
+        self.patch.start()
+        self.context = app.app_context()
+        self.context.push()
+
+    def tearDown(self):
+        self.context.pop()
+        self.patch.stop()
+        self.directory.cleanup()
+
+    def __write_flat__(self, path: str, data) -> str:
+        path_filename = os.path.join(self.directory.name, path)
+        os.makedirs(os.path.dirname(path_filename), exist_ok=True)
+        with open(path_filename, "w") as file:
+            json.dump(data, file, indent=4)
+        return path_filename
+
+    def test_shard(self):
+        assert cache_layout.shard("test.json") == "29/f2/"
+        assert FileIo(wari_id="test", subfolder="urls/").path_filename == (
+            f"{self.directory.name}/urls/29/f2/test.json"
+        )
+
+    def test_read_flat_layout(self):
+        self.__write_flat__("test.json", {"id": 1})
+        io = FileIo(wari_id="test")
+        io.read_from_disk()
+        assert io.data == {"id": 1, "served_from_cache": True}
+
+        with patch.object(cache_layout, "CACHE_FLAT_FALLBACK", False):
+            io = FileIo(wari_id="test")
+            io.read_from_disk()
+        assert io.data is None
+
+        # writing replaces the file in the flat layout
+        FileIo(wari_id="test", data={"id": 2}).write_to_disk()
+        assert not os.path.exists(f"{self.directory.name}/test.json")
+        io = FileIo(wari_id="test")
+        io.read_from_disk()
+        assert io.data == {"id": 2, "served_from_cache": True}
+
+    def test_migrate(self):
+        url = self.__write_flat__("urls/abc.json", {"id": "abc"})
+        archive = self.__write_flat__("urls/archives/def.json.gz", {"id": "def"})
+        self.__write_flat__("urls/README", {})
+        self.__write_flat__("urls/.abc.json.1234.tmp", {})
+        # already written again in the sharded layout
+        stale = self.__write_flat__("dois/ghi.json", {"id": "ghi"})
+        FileIo(wari_id="ghi", subfolder="dois/", data={"id": "new"}).write_to_disk()
+        self.__write_flat__("dois/ghi.json", {"id": "ghi"})
+
+        assert cache_layout.migrate(self.directory.name, dry_run=True) == (2, 1)
+        assert os.path.exists(url) and os.path.exists(archive) and os.path.exists(stale)
+
+        assert cache_layout.migrate(self.directory.name) == (2, 1)
+        assert not os.path.exists(url)
+        assert not os.path.exists(archive)
+        assert not os.path.exists(stale)
+        assert os.path.exists(f"{self.directory.name}/urls/README")
+        assert os.path.exists(f"{self.directory.name}/urls/.abc.json.1234.tmp")
+        assert os.path.exists(
+            UrlFileIo(hash_based_id="abc").path_filename
+        )
+        assert os.path.exists(
+            f"{UrlArchiveFileIo(hash_based_id='def').path_filename}.gz"
+        )
+        with patch.object(cache_layout, "CACHE_FLAT_FALLBACK", False):
+            io = FileIo(wari_id="ghi", subfolder="dois/")
+            io.read_from_disk()
+        assert io.data == {"id": "new", "served_from_cache": True}
+
+        # nothing left to do
+        assert cache_layout.migrate(self.directory.name) == (0, 0)
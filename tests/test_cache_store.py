@@ -0,0 +1,105 @@
+import gzip
+import json
+import os
+import sqlite3
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+import config
+from src import app
+from src.helpers import cache_store
+from src.models.file_io import FileIo
+from src.models.file_io.reference_file_io import ReferenceFileIo
+from src.models.v2.file_io.article_file_io_v2 import ArticleFileIoV2
+from src.models.v2.job.article_job_v2 import ArticleJobV2
+
+data = {"title": "Ä test", "references": [{"id": 1}] * 3}
+
+
+class TestSqliteStore(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = f"{self.directory.name}/cache.sqlite3"
+        self.patches = [
+            patch.object(config, "subdirectory_for_json", f"{self.directory.name}/"),
+            patch.object(cache_store, "CACHE_STORE", "sqlite"),
+            patch.object(cache_store, "_stores", {}),
+        ]
+        for p in self.patches:
+            p.start()
+        self.context = app.app_context()
+        self.context.push()
+
+    def tearDown(self):
+        self.context.pop()
+        for p in self.patches:
+            p.stop()
+        self.directory.cleanup()
+
+    def __select__(self, query: str):
+        with sqlite3.connect(self.path) as connection:
+            return connection.execute(query).fetchall()
+
+    def test_get_store(self):
+        store = cache_store.get_store()
+        assert isinstance(store, cache_store.SqliteStore)
+        assert store.path == self.path
+        assert cache_store.get_store() is store
+        with patch.object(cache_store, "CACHE_STORE", "file"):
+            assert isinstance(cache_store.get_store(), cache_store.FileStore)
+
+    def test_write_and_read(self):
+        FileIo(wari_id="test", subfolder="urls/", data=data).write_to_disk()
+        # one database instead of a file per entry
+        assert os.listdir(self.directory.name)[0].startswith("cache.sqlite3")
+        assert not os.path.exists(f"{self.directory.name}/urls")
+        assert self.__select__("PRAGMA journal_mode") == [("wal",)]
+
+        io = FileIo(wari_id="test", subfolder="urls/")
+        io.read_from_disk()
+        assert io.data == dict(data, served_from_cache=True)
+        raw, encoding = io.read_bytes_from_disk(accept_encodings=["gzip"])
+        assert encoding == "gzip"
+        assert json.loads(gzip.decompress(raw)) == data
+
+        # another subfolder is another entry
+        io = FileIo(wari_id="test", subfolder="dois/")
+        io.read_from_disk()
+        assert io.data is None
+
+        FileIo(wari_id="test", subfolder="urls/", data={"title": "new"}).write_to_disk()
+        io = FileIo(wari_id="test", subfolder="urls/")
+        io.read_from_disk()
+        assert io.data == {"title": "new", "served_from_cache": True}
+
+    def test_metadata(self):
+        job = ArticleJobV2(lang="en", page_id=1, revision=2)
+        ArticleFileIoV2(job=job, data=data).write_to_disk()
+        ((key, lang, page_id, revision, size, payload_size, version),) = self.__select__(
+            "SELECT key, lang, page_id, revision, size, length(payload), version FROM cache"
+        )
+        assert key == "articlesV2/en.wikipedia.org.1.2.compact.json"
+        assert (lang, page_id, revision) == ("en", 1, 2)
+        assert size == payload_size
+        assert version
+        indexes = {row[1] for row in self.__select__("PRAGMA index_list(cache)")}
+        assert {
+            "cache_page_index",
+            "cache_created_at_index",
+            "cache_size_index",
+            "cache_version_index",
+        } <= indexes
+
+    def test_read_many(self):
+        ids = [f"{number:032x}" for number in range(5)]
+        for hash_based_id in ids[:4]:
+            ReferenceFileIo(
+                hash_based_id=hash_based_id, data={"id": hash_based_id}
+            ).write_to_disk()
+        ios = [ReferenceFileIo(hash_based_id=hash_based_id) for hash_based_id in ids]
+        with patch.object(cache_store, "MAX_VARIABLES", 2):
+            ReferenceFileIo.read_many_from_disk(ios)
+        assert [io.data for io in ios] == [
+            {"id": hash_based_id, "served_from_cache": True} for hash_based_id in ids[:4]
+        ] + [None]
@@ -0,0 +1,31 @@
+from unittest import TestCase
+
+import config
+from src.helpers import http_client
+
+
+class TestHttpClient(TestCase):
+    def test_session_is_shared(self):
+        assert http_client.get_session() is http_client.get_session()
+
+    def test_session_defaults(self):
+        session = http_client.get_session()
+        assert session.headers["User-Agent"] == config.user_agent
+        adapter = session.get_adapter("https://en.wikipedia.org/")
+        assert isinstance(adapter, http_client.TimeoutHTTPAdapter)
+        assert adapter.timeout == http_client.DEFAULT_TIMEOUT
+        assert adapter._pool_maxsize == http_client.POOL_MAXSIZE
+
+    def test_default_timeout_only_for_wikimedia(self):
+        adapter = http_client.get_session().get_adapter("https://en.wikipedia.org/")
+        for url in (
+            "https://en.wikipedia.org/w/rest.php/v1/page/Test",
+            "https://ores.wikimedia.org/v3/scores/enwiki/1/articlequality",
+        ):
+            assert adapter.default_timeout(url) == http_client.DEFAULT_TIMEOUT
+        for url in (
+            "https://iabot-api.archive.org/testdeadlink.php",
+            "https://api.crossref.org/works/10.1000/1",
+            "https://notwikipedia.org/",
+        ):
+            assert adapter.default_timeout(url) is None
@@ -0,0 +1,105 @@
+import timeit
+from unittest import TestCase
+
+import mwparserfromhell  # type: ignore
+from bs4 import BeautifulSoup
+
+from iarilib.parse_utils import (
+    extract_cite_refs,
+    extract_comments,
+    extract_ref_name,
+    parse_reference_subtrees,
+    remove_html_comments,
+    tag_html,
+)
+
+html = (
+    "<html><body>"
+    '<section><h2 id="History">History</h2><p>Prose &amp; more prose</p></section>'
+    '<section><h2 id="References">References</h2>'
+    '<div class="mw-references-wrap mw-references-columns"><ol class="mw-references references">'
+    '<li about="#cite_note-INE-1" id="cite_note-INE-1">'
+    '<a href="./Test#cite_ref-INE_1-0"><span class="mw-linkback-text">1 </span></a>'
+    '<span class="mw-reference-text"><cite class="citation web">'
+    '<a href="http://www.ine.cl/">Censo</a></cite></span></li>'
+    "</ol></div></section>"
+    '<section><h2 id="Bibliography">Bibliography</h2><ul><li id="b1"><cite>Book</cite></li></ul>'
+    '<section><h3 id="Sub">Sub</h3><ul><li>nested</li></ul></section></section>'
+    '<section><h2 id="External_links">External links</h2><ul><li>link</li></ul></section>'
+    "</body></html>"
+)
+
+
+class TestParseUtils(TestCase):
+    def test_parse_reference_subtrees(self):
+        soup = parse_reference_subtrees(html)
+        assert soup.find("div", class_="mw-references-wrap") is not None
+        sections = soup.find_all("section")
+        assert [section.find(["h2", "h3"]).get("id") for section in sections] == [
+            "Bibliography",
+            "Sub",
+        ]
+        assert soup.find("p") is None
+
+    def test_parse_reference_subtrees_same_cite_refs(self):
+        full = extract_cite_refs(None, soup=BeautifulSoup(html, "lxml"))
+        targeted = extract_cite_refs(None, soup=parse_reference_subtrees(html))
+        assert len(full) == 1
+        assert targeted == full
+
+    def test_parse_reference_subtrees_empty(self):
+        assert str(parse_reference_subtrees("")) == ""
+
+    def test_extract_cite_refs_html(self):
+        soup = parse_reference_subtrees(html)
+        compact = extract_cite_refs(None, soup=soup)[0]["cite_html"]
+        assert compact == (
+            '<cite class="citation web"><a href="http://www.ine.cl/">Censo</a></cite>'
+        )
+        pretty = extract_cite_refs(None, soup=soup, pretty_html=True)[0]["cite_html"]
+        assert pretty == soup.find("cite").prettify()
+        assert pretty != compact
+        omitted = extract_cite_refs(None, soup=soup, omit_html=True)[0]
+        assert omitted["cite_html"] is None
+        assert omitted["span_html"] is None
+        assert omitted["urls"] == ["http://www.ine.cl/"]
+        assert tag_html(None) is None
+
+    def test_extract_ref_name(self):
+        assert extract_ref_name(mwparserfromhell.parse('<ref name="Wilson">text</ref>')) == "Wilson"
+        assert extract_ref_name(mwparserfromhell.parse('<ref name="Wilson"\\>')) == "Wilson"
+        assert extract_ref_name(mwparserfromhell.parse("<ref name=terry_hunt/>")) == "terry_hunt"
+        assert extract_ref_name(mwparserfromhell.parse('<ref name="a&amp;b">x</ref>')) == "a&b"
+        assert extract_ref_name(mwparserfromhell.parse("<ref>text</ref>")) == ""
+
+    def test_extract_comments(self):
+        wikicode = mwparserfromhell.parse(
+            "<ref>text<!-- first -->{{cite web|url=http://example.com<!--second-->}}</ref>"
+        )
+        assert extract_comments(wikicode.filter_tags()[0]) == [" first ", "second"]
+        assert extract_comments(mwparserfromhell.parse("<ref>text</ref>")) == []
+
+    def test_remove_html_comments(self):
+        assert remove_html_comments("test<!--test-->") == "test"
+        assert remove_html_comments("a<!--x-->b<!--y-->c") == "abc"
+        assert remove_html_comments("a<!--x\ny-->b\nc") == "ab\nc"
+        assert remove_html_comments("a<!-- never closed") == "a"
+        assert remove_html_comments("no comment") == "no comment"
+
+    def test_remove_html_comments_adversarial_inputs_are_linear(self):
+        """Micro-benchmark, the regex we used before was quadratic on these"""
+
+        def best_time(text: str) -> float:
+            return min(timeit.repeat(lambda: remove_html_comments(text), number=1, repeat=5))
+
+        for build in [
+            lambda n: "<!--" * n,  # many unterminated comments
+            lambda n: "<!--x-->" * n,  # many comments
+            lambda n: "a" * n + "<!--" + "b" * n,  # long unterminated comment
+            lambda n: "<!--" + "-" * n,  # dashes but no end
+        ]:
+            small = best_time(build(20000))
+            large = best_time(build(160000))
+            # 8 times the input, allow for noise but not for quadratic growth (64 times)
+            assert large < max(small, 0.0005) * 24
+            assert large < 0.5
@@ -0,0 +1,19 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.helpers.per_process import PerProcess
+
+
+class TestPerProcess(TestCase):
+    def test_created_once_per_process(self):
+        created = []
+        holder = PerProcess(create=lambda: created.append(object()) or created[-1])
+        assert not holder.created
+        assert holder.get() is holder.get() is created[0]
+        assert holder.created
+        # like a worker forked after the object was created
+        with patch("os.getpid", return_value=-1):
+            assert not holder.created
+            assert holder.get() is created[1]
+        holder.reset()
+        assert holder.get() is created[2]
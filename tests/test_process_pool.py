@@ -0,0 +1,79 @@
+from typing import List
+from unittest import TestCase
+from unittest.mock import patch
+
+from src import app
+from src.helpers import process_pool
+from src.models.v2.job.article_job_v2 import ArticleJobV2
+from src.models.v2.wikimedia.wikipedia.reference.extractor_v2 import (
+    WikipediaReferenceExtractorV2,
+)
+from test_data.test_content import (  # type: ignore
+    easter_island_head_excerpt,
+    easter_island_tail_excerpt,
+    electrical_breakdown_full_article,
+)
+
+
+def double(batch: List[int]) -> List[int]:
+    return [item * 2 for item in batch]
+
+
+class TestProcessPool(TestCase):
+    def tearDown(self):
+        process_pool.shutdown()
+
+    def test_disabled_by_default(self):
+        with patch.object(process_pool, "EXTRACTION_WORKERS", 0):
+            assert not process_pool.enabled(size=10**9)
+        with patch.object(process_pool, "EXTRACTION_WORKERS", 2), patch.object(
+            process_pool, "PARALLEL_EXTRACTION_MIN_SIZE", 100
+        ):
+            assert not process_pool.enabled(size=99)
+            assert process_pool.enabled(size=100)
+
+    def test_map_in_batches_keeps_order(self):
+        with patch.object(process_pool, "EXTRACTION_WORKERS", 2):
+            assert process_pool.get_pool() is process_pool.get_pool()
+            assert process_pool.map_in_batches(double, range(37)) == [
+                item * 2 for item in range(37)
+            ]
+            assert process_pool.map_in_batches(double, []) == []
+
+    @staticmethod
+    def __extract__(wikitext: str) -> WikipediaReferenceExtractorV2:
+        extractor = WikipediaReferenceExtractorV2(
+            wikitext=wikitext,
+            job=ArticleJobV2(url="https://en.wikipedia.org/wiki/Test"),
+            testing=True,
+        )
+        with app.app_context():
+            extractor.extract_all_references()
+        return extractor
+
+    def test_parallel_extraction_is_the_same_as_serial(self):
+        for wikitext in [
+            easter_island_head_excerpt,
+            easter_island_tail_excerpt,
+            electrical_breakdown_full_article,
+        ]:
+            serial = self.__extract__(wikitext)
+            with patch.object(process_pool, "EXTRACTION_WORKERS", 2), patch.object(
+                process_pool, "PARALLEL_EXTRACTION_MIN_SIZE", 0
+            ):
+                parallel = self.__extract__(wikitext)
+            assert [section.name for section in parallel.sections] == [
+                section.name for section in serial.sections
+            ]
+            assert parallel.number_of_references == serial.number_of_references > 0
+            for expected, reference in zip(serial.references, parallel.references):
+                assert str(reference.wikicode) == str(expected.wikicode)
+                assert reference.reference_id == expected.reference_id
+                assert reference.section == expected.section
+                assert reference.is_general_reference == expected.is_general_reference
+                assert reference.template_names == expected.template_names
+                # the urls come from a set, the workers have their own hash seed
+                assert sorted(reference.raw_urls) == sorted(expected.raw_urls)
+                assert reference.get_template_dicts == expected.get_template_dicts
+                for template in reference.templates or []:
+                    assert template.raw_template is not None
@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+import mwparserfromhell  # type: ignore
+
+from src import app
+from src.helpers import reference_cache
+from src.models.v2.wikimedia.wikipedia.reference import WikipediaReferenceV2
+
+wikitext = (
+    '<ref name="test">{{cite web|url=http://www.example.com/a|title=A}} '
+    "{{cite book|title=B|chapter-url=https://books.example.org/b}} "
+    "see [https://www.example.net/c C]</ref>"
+)
+
+
+class TestReferenceCache(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.patch = patch.object(
+            reference_cache,
+            "REFERENCE_CACHE_PATH",
+            os.path.join(self.directory.name, "references.sqlite3"),
+        )
+        self.patch.start()
+
+    def tearDown(self):
+        reference_cache.close()
+        self.patch.stop()
+        self.directory.cleanup()
+
+    def test_disabled_by_default(self):
+        with patch.object(reference_cache, "REFERENCE_CACHE_PATH", ""):
+            assert not reference_cache.enabled()
+            reference_cache.put(("a", "1"), b"payload")
+            assert reference_cache.get(("a", "1")) is None
+
+    def test_put_get_is_persistent(self):
+        reference_cache.put(("a", "1"), b"payload")
+        # not flushed yet but we still get it
+        assert reference_cache.get(("a", "1")) == b"payload"
+        reference_cache.close()
+        assert reference_cache.get(("a", "1")) == b"payload"
+        assert reference_cache.get(("a", "2")) is None
+        assert reference_cache.info()["entries"] == 1
+
+    def test_least_recently_used_are_evicted(self):
+        with patch.object(reference_cache, "REFERENCE_CACHE_MAX_ENTRIES", 10):
+            for number in range(10):
+                reference_cache.put((str(number), "1"), b"payload")
+            reference_cache.flush()
+            with patch("time.time", return_value=2**40):
+                assert reference_cache.get(("0", "1")) == b"payload"
+                reference_cache.flush()
+            reference_cache.put(("10", "1"), b"payload")
+            reference_cache.flush()
+            assert reference_cache.info()["entries"] == 9
+            assert reference_cache.get(("0", "1")) == b"payload"
+            assert reference_cache.get(("10", "1")) == b"payload"
+
+    @staticmethod
+    def __extract__() -> WikipediaReferenceV2:
+        reference = WikipediaReferenceV2(
+            wikicode=mwparserfromhell.parse(wikitext).nodes[0],
+            section="test",
+            language_code="en",
+        )
+        with app.app_context():
+            reference.extract_and_check()
+        return reference
+
+    def test_reference_is_extracted_once(self):
+        extracted = self.__extract__()
+        hits = reference_cache.info()["hits"]
+        reference_cache.close()
+        cached = self.__extract__()
+        assert reference_cache.info()["hits"] == hits + 1
+        assert cached.reference_id == extracted.reference_id
+        assert cached.get_name == "test"
+        assert cached.template_names == extracted.template_names == [
+            "cite web",
+            "cite book",
+        ]
+        assert cached.get_template_dicts == extracted.get_template_dicts
+        assert sorted(cached.raw_urls) == sorted(extracted.raw_urls)
+        assert len(cached.raw_urls) == 3
+        assert cached.url_origins == extracted.url_origins
+        assert sorted(cached.unique_first_level_domains) == [
+            "example.com",
+            "example.net",
+            "example.org",
+        ]
+        for template in cached.templates:
+            assert template.raw_template in cached.wikicode.contents.filter_templates()
+
+    def test_reference_is_cached_as_json(self):
+        extracted = self.__extract__()
+        payload = json.loads(reference_cache.get(extracted.cache_key))
+        assert sorted(payload["urls"]) == sorted(extracted.raw_urls)
+        assert payload["templates"][0]["parameters"]["url"] == "http://www.example.com/a"
+
+    def test_broken_payload_is_extracted_again(self):
+        reference = self.__extract__()
+        reference_cache.put(reference.cache_key, b"\x80\x05garbage")
+        extracted = self.__extract__()
+        assert len(extracted.raw_urls) == 3
@@ -0,0 +1,55 @@
+from unittest import TestCase
+
+import mwparserfromhell  # type: ignore
+
+from src.models.v2.wikimedia.wikipedia.section_index_v2 import WikipediaSectionIndexV2
+from test_data.test_content import easter_island_tail_excerpt  # type: ignore
+
+wikitext = (
+    "Intro <ref>{{cite web|url=http://example.com}}</ref>\n"
+    "{{Infobox\n|a=1\n}}\n"
+    "== History ==\n"
+    "Text\n"
+    "=== Early ===\n"
+    "More text\n"
+    "= Top =\n"
+    "Not in a level 2 section\n"
+    "== References ==\n"
+    "* {{cite book|title=Book}}\n"
+)
+
+
+class TestWikipediaSectionIndexV2(TestCase):
+    @staticmethod
+    def __index__(text: str):
+        wikicode = mwparserfromhell.parse(text)
+        index = WikipediaSectionIndexV2(wikitext=text)
+        index.build(wikicode=wikicode)
+        return wikicode, index
+
+    def test_sections_are_the_same_as_get_sections(self):
+        for text in [wikitext, easter_island_tail_excerpt]:
+            wikicode, index = self.__index__(text)
+            sections = wikicode.get_sections(levels=[2], include_headings=True)
+            assert index.number_of_sections == len(sections)
+            for number, section in enumerate(sections):
+                assert str(index.section_wikicode(wikicode=wikicode, number=number)) == str(
+                    section
+                )
+                assert index.names[number] == str(section).split("\n")[0].replace("=", "")
+
+    def test_lines(self):
+        _, index = self.__index__(wikitext)
+        lines = wikitext.split("\n")
+        assert index.number_of_lines == len(lines)
+        assert index.names == [" History ", " References "]
+        assert list(index.section_first_lines) == [4, 10]
+        assert list(index.section_end_lines) == [8, 13]
+        assert lines[index.section_first_lines[0]] == "== History =="
+        assert index.line_number(wikitext.index("Not in a level 2")) == 9
+
+    def test_root_end(self):
+        _, index = self.__index__(wikitext)
+        assert wikitext[: index.root_end] == "\n".join(wikitext.split("\n")[:4]) + "\n"
+        _, index = self.__index__("== History ==\nText\n")
+        assert index.root_end == 0
@@ -0,0 +1,75 @@
+import pickle
+from unittest.mock import patch
+
+from mwparserfromhell import parse  # type: ignore
+
+from src.models.v2.wikimedia.wikipedia.reference import WikipediaReferenceV2
+from src.models.v2.wikimedia.wikipedia.url_v2 import WikipediaUrlV2
+from src.models.wikimedia.wikipedia.reference.enums import UrlOrigin
+
+
+class TestWikipediaReferenceV2:
+    def test_urls_are_harvested_with_origins(self):
+        reference = WikipediaReferenceV2(
+            wikicode=parse(
+                "* {{cite web|url=http://template.example.com/a}} "
+                "http://bare.example.com/b [http://link.example.com/c Link] "
+                "[http://template.example.com/a again]"
+            ),
+            section="Bibliography",
+            is_general_reference=True,
+        )
+        with patch.object(
+            WikipediaUrlV2, "extract_many", wraps=WikipediaUrlV2.extract_many
+        ) as extract_many:
+            reference.extract_and_check()
+        # one call for the template and one for the rest of the reference
+        assert extract_many.call_count == 2
+        assert reference.url_origins == {
+            "http://template.example.com/a": [UrlOrigin.TEMPLATE, UrlOrigin.WIKICODED],
+            # mwparserfromhell also sees free urls as external links
+            "http://bare.example.com/b": [UrlOrigin.BARE, UrlOrigin.WIKICODED],
+            "http://link.example.com/c": [UrlOrigin.WIKICODED],
+        }
+        assert [url.url for url in reference.bare_urls] == ["http://bare.example.com/b"]
+        assert sorted(url.url for url in reference.wikicoded_links) == [
+            "http://bare.example.com/b",
+            "http://link.example.com/c",
+            "http://template.example.com/a",
+        ]
+        assert sorted(url.url for url in reference.reference_urls) == [
+            "http://bare.example.com/b",
+            "http://link.example.com/c",
+            "http://template.example.com/a",
+        ]
+        assert reference.unique_first_level_domains == ["example.com"]
+
+    def test_footnote_reference_has_no_bare_urls(self):
+        reference = WikipediaReferenceV2(
+            wikicode=parse("<ref>http://bare.example.com [http://link.example.com Link]</ref>")
+            .filter_tags()[0],
+            section="root",
+        )
+        reference.extract_and_check()
+        assert reference.bare_urls == []
+        assert sorted(url.url for url in reference.wikicoded_links) == [
+            "http://bare.example.com",
+            "http://link.example.com",
+        ]
+
+    def test_is_a_light_record_that_pickles(self):
+        reference = WikipediaReferenceV2(
+            wikicode=parse("<ref>{{cite web|url=http://example.com/a}}</ref>")
+            .filter_tags()[0],
+            section="root",
+        )
+        reference.extract_and_check()
+        assert not hasattr(reference, "__dict__")
+        assert not hasattr(reference.templates[0], "__dict__")
+        assert not hasattr(reference.reference_urls[0], "__dict__")
+        reference.detach_wikicode()
+        unpickled = pickle.loads(pickle.dumps(reference))
+        assert unpickled.get_fields().keys() == reference.get_fields().keys()
+        assert unpickled.reference_id == reference.reference_id
+        assert unpickled.get_template_dicts == reference.get_template_dicts
+        assert unpickled.get_reference_url_dicts == reference.get_reference_url_dicts
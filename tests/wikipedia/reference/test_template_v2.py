@@ -0,0 +1,38 @@
+from unittest.mock import patch
+
+from mwparserfromhell import parse  # type: ignore
+
+from src.models.v2.wikimedia.wikipedia.reference import template as template_module
+from src.models.v2.wikimedia.wikipedia.reference.template import WikipediaTemplateV2
+from src.models.v2.wikimedia.wikipedia.url_v2 import WikipediaUrlV2
+
+
+class TestTemplateV2:
+    data = (
+        "{{cite web|url=http://example.com|archive-url=https://web.archive.org/web/20200101000000/"
+        "http://example.com|lien-web=http://example.fr}}"
+    )
+
+    def test_urls_are_extracted_once(self):
+        template = WikipediaTemplateV2(raw_template=parse(self.data).filter_templates()[0])
+        with patch.object(
+            WikipediaUrlV2, "extract_many", wraps=WikipediaUrlV2.extract_many
+        ) as extract_many:
+            template.extract_and_prepare_parameter_and_flds()
+            urls = template.urls
+            assert template.urls is urls
+            assert extract_many.call_count == 1
+        assert sorted(url.url for url in urls) == [
+            "http://example.com",
+            "https://web.archive.org/web/20200101000000/http://example.com",
+        ]
+
+    def test_url_parameter_names_per_language(self):
+        names = dict(template_module.url_parameter_names)
+        names["fr"] = names[""] + ("lien_web",)
+        with patch.object(template_module, "url_parameter_names", names):
+            template = WikipediaTemplateV2(
+                raw_template=parse(self.data).filter_templates()[0], language_code="fr"
+            )
+            template.extract_and_prepare_parameter_and_flds()
+        assert "http://example.fr" in [url.url for url in template.urls]
@@ -0,0 +1,52 @@
+from unittest import TestCase
+
+from src.models.v2.wikimedia.wikipedia.url_v2 import (
+    UrlAnalysis,
+    WikipediaUrlV2,
+    analyze_url,
+    url_analysis_cache_info,
+)
+from src.models.wikimedia.wikipedia.enums import MalformedUrlError
+
+
+class TestWikipediaUrlV2(TestCase):
+    archive_url = "https://web.archive.org/web/20141031094104/http://collections.rmg.co.uk/collections/objects/13275.html"
+    valid_url = "https://en.wikipedia.org/wiki/Test"
+
+    def test_extract_archive_url(self):
+        url = WikipediaUrlV2(url=self.archive_url)
+        url.extract()
+        assert url.first_level_domain == "rmg.co.uk"
+        assert url.wayback_machine_timestamp == "20141031094104"
+        assert url.archived_url.startswith("http://collections.rmg.co.uk/")
+        assert url.malformed_url is False
+
+    def test_extract_malformed(self):
+        url = WikipediaUrlV2(url="www.example.com/test")
+        url.extract()
+        assert url.malformed_url is True
+        assert url.malformed_url_details == MalformedUrlError.MISSING_SCHEME
+
+    def test_analysis_is_cached(self):
+        analyze_url.cache_clear()
+        first = analyze_url(self.valid_url)
+        second = analyze_url(self.valid_url)
+        assert first is second
+        assert isinstance(first, UrlAnalysis)
+        info = url_analysis_cache_info()
+        assert info.hits == 1
+        assert info.misses == 1
+
+    def test_extract_many(self):
+        urls = WikipediaUrlV2.extract_many(
+            [self.valid_url, self.archive_url, self.valid_url]
+        )
+        assert [url.url for url in urls] == [
+            self.valid_url,
+            self.archive_url,
+            self.valid_url,
+        ]
+        for url in urls:
+            single = WikipediaUrlV2(url=url.url)
+            single.extract()
+            assert url.get_dict == single.get_dict